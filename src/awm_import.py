@@ -0,0 +1,174 @@
+"""API importable du générateur d'import AWM (production), sans aucun input().
+
+Toutes les réponses normalement demandées par set_prod_app.py sont des paramètres :
+
+    import awm_import
+
+    data = awm_import.load(Path("machine.xlsm"))          # réutilisable entre plusieurs appels
+    for name, lines in awm_import.text_lines(data, "en").items():
+        ...                                                # générateurs de lignes CSV
+    cfg = awm_import.machines_config(data, "en", num_com=1, machine_names={1: ("Remplisseuse", "Filler")})
+
+Les données lues ne sont jamais modifiées par les fonctions de construction.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import set_prod_app as app
+from output_writer import write_json, write_lines
+from sqlite_bundle import BUNDLE_NAME, write_prod_bundle
+from text_ids import TextIdRegistry
+
+
+class MissingModulesError(ValueError):
+    """Modules utilisés par des bypass/boutons mais absents du sommaire et non fournis."""
+
+    def __init__(self, modules: List[str]):
+        super().__init__(f"Modules absents du sommaire : {', '.join(modules)}")
+        self.modules = modules
+
+
+# ============================================================
+# Lecture
+# ============================================================
+
+
+def _silent(*args: Any, **kwargs: Any) -> None:
+    pass
+
+
+def load(excel_path: Path, log: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """Lit le classeur (voir set_prod_app.read_excel). Silencieux sauf si log est fourni."""
+    return app.read_excel(Path(excel_path), log=log or _silent)
+
+
+def num_machines(data: Dict[str, Any], modules: Optional[Dict[str, Dict[str, Any]]] = None) -> List[int]:
+    return app.machine_nums(_modules_cfg(data, modules))
+
+
+# ============================================================
+# Textes (CSV)
+# ============================================================
+
+
+def text_id_registry(dedupe: bool = False) -> TextIdRegistry:
+    """Registre des IDs de textes (doublons, plages BASE_ID_*), à passer à text_lines / write_outputs."""
+    return TextIdRegistry(app.TEXT_ID_RANGES, dedupe=dedupe)
+
+
+def text_lines(
+    data: Dict[str, Any], lang: str, registry: Optional[TextIdRegistry] = None
+) -> Dict[str, Iterator[str]]:
+    """Nom de fichier -> générateur des lignes CSV.
+
+    Sans registre, rien n'est calculé avant l'itération. Avec un registre, tous les IDs sont déclarés
+    d'abord (voir set_prod_app.accepted_texts) : mêmes lignes retenues que set_prod_app.
+    """
+    num_lang = app.TRANSLATE["defaut"][lang]
+    if registry is not None:
+        return {name: app.csv_lines(texts) for name, texts in app.accepted_texts(data, num_lang, registry).items()}
+    return {
+        "defaut.csv": app.defaut_lines(data["defauts"], num_lang),
+        "bypass.csv": app.bypass_lines(data["bypass"], num_lang),
+        "button.csv": app.button_lines(data["buttons"], num_lang),
+    }
+
+
+# ============================================================
+# JSON (buttons / bypass, machines)
+# ============================================================
+
+
+def _modules_cfg(data: Dict[str, Any], modules: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Copie de modules_cfg complétée par modules ; lève MissingModulesError s'il en manque."""
+    modules_cfg = dict(data["modules_cfg"])
+    for module, cfg in (modules or {}).items():
+        modules_cfg.setdefault(
+            module, {"num_machine": int(cfg["num_machine"]), "num_module": int(cfg["num_module"])}
+        )
+
+    missing = [str(m) for m in app.used_modules(data) if m not in modules_cfg]
+    if missing:
+        raise MissingModulesError(missing)
+
+    return modules_cfg
+
+
+def button_bypass_config(
+    data: Dict[str, Any], num_com: int, modules: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Contenu de config_button_bypass.json. modules complète le sommaire : {module: {num_machine, num_module}}."""
+    modules_cfg = _modules_cfg(data, modules)
+    return app.build_buttons_bypass_json(dict(data, modules_cfg=modules_cfg), num_com)
+
+
+def machines_config(
+    data: Dict[str, Any],
+    lang: str,
+    num_com: int,
+    machine_names: Optional[Dict[int, Tuple[str, str]]] = None,
+    recipes_dbs: Optional[Dict[int, Path]] = None,
+    modules: Optional[Dict[str, Dict[str, Any]]] = None,
+    fetch_recipes: Callable[[Path], List[Tuple[Any, Any, Any, Any]]] = app.fetch_recipes,
+) -> Dict[str, Any]:
+    """Contenu de config_machines.json.
+
+    machine_names : {num_machine: (nom langue 1, nom langue 2)}, "Machine <n>" par défaut.
+    recipes_dbs : {num_machine: chemin de la bdd des recettes}, aucune recette par défaut ;
+    FileNotFoundError si un chemin n'est pas un fichier existant (sqlite3 créerait une bdd vide).
+    fetch_recipes : lecture des lignes de recettes d'une bdd (remplaçable, ex. par une version en cache).
+    """
+    modules_cfg = _modules_cfg(data, modules)
+    for num, db_path in (recipes_dbs or {}).items():
+        if not Path(db_path).is_file():
+            raise FileNotFoundError(f"Bdd des recettes introuvable pour la machine {num} : {db_path}")
+
+    names = {n: (f"Machine {n}", f"Machine {n}") for n in app.machine_nums(modules_cfg)}
+    names.update(machine_names or {})
+
+    machines = app.build_machines(modules_cfg, names)
+    num_lang_bdd = app.TRANSLATE["bdd"][lang]
+    recipes = {
+        num: app.build_recipes(fetch_recipes(Path(db_path)), num_lang_bdd)
+        for num, db_path in (recipes_dbs or {}).items()
+        if num in machines
+    }
+    return app.build_machines_json(machines, recipes, data, num_com)
+
+
+# ============================================================
+# Écriture
+# ============================================================
+
+
+def write_outputs(
+    data: Dict[str, Any],
+    lang: str,
+    num_com: int,
+    out_dir: Path,
+    machine_names: Optional[Dict[int, Tuple[str, str]]] = None,
+    recipes_dbs: Optional[Dict[int, Path]] = None,
+    modules: Optional[Dict[str, Dict[str, Any]]] = None,
+    registry: Optional[TextIdRegistry] = None,
+    bundle: bool = False,
+) -> Dict[str, bool]:
+    """Écrit les 5 fichiers dans out_dir, plus le bundle SQLite si bundle=True.
+
+    Retourne {nom de fichier: modifié ?} des 5 fichiers (le bundle, réécrit à chaque appel, n'y figure pas).
+    Tout le contenu est construit (et vérifié : modules, bdd des recettes) avant la première écriture :
+    en cas d'erreur, out_dir n'est pas modifié.
+    """
+    button_bypass_cfg = button_bypass_config(data, num_com, modules)
+    machines_cfg = machines_config(data, lang, num_com, machine_names, recipes_dbs, modules)
+    texts = app.accepted_texts(data, app.TRANSLATE["defaut"][lang], registry)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    changed = {name: write_lines(out_dir / name, app.csv_lines(entries)) for name, entries in texts.items()}
+    changed["config_button_bypass.json"] = write_json(out_dir / "config_button_bypass.json", button_bypass_cfg)
+    changed["config_machines.json"] = write_json(out_dir / "config_machines.json", machines_cfg)
+
+    if bundle:
+        write_prod_bundle(out_dir / BUNDLE_NAME, texts, button_bypass_cfg, machines_cfg)
+    return changed
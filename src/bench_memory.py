@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table
+
+import set_prod_app as app
+from output_writer import write_json
+
+try:
+    import resource  # Unix uniquement
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+DEFAULT_SIZES = (500, 1000, 2000)
+ROWS_PER_MODULE = 100
+
+# Budget mémoire (pic tracemalloc) par ligne de table, en octets.
+BUDGET_PER_ROW = {
+    "read_excel": 16_000,
+    "table_to_list": 1_000,
+    "export_defauts_csv": 500,
+    "export_bypass_csv": 800,
+    "export_button_csv": 800,
+    "build_buttons_bypass": 800,
+    "json_buttons_bypass": 200,
+    "build_recipes": 800,
+    "json_machines": 200,
+}
+# Budget par module (les machines/EMs croissent avec le nombre de modules, pas de lignes), en octets.
+BUDGET_PER_MODULE = {
+    "build_machines": 20_000,
+}
+# Croissance : coût marginal par ligne entre deux tailles successives, comparé au premier intervalle
+# ((pic(n2) - pic(n1)) / (n2 - n1) <= GROWTH_TOLERANCE * max(pente du premier intervalle, MIN_SLOPE))
+GROWTH_TOLERANCE = 1.5
+MIN_SLOPE = 16
+
+
+# ============================================================
+# Génération des classeurs / bdd de test
+# ============================================================
+
+
+def _add_table(ws, name: str, headers: List[str], rows: List[List[Any]], first_row: int = 5, first_col: int = 1):
+    for i, h in enumerate(headers):
+        ws.cell(first_row, first_col + i, h)
+    for r, values in enumerate(rows, start=first_row + 1):
+        for i, v in enumerate(values):
+            ws.cell(r, first_col + i, v)
+    ref = (
+        f"{get_column_letter(first_col)}{first_row}:"
+        f"{get_column_letter(first_col + len(headers) - 1)}{first_row + max(len(rows), 1)}"
+    )
+    ws.add_table(Table(displayName=name, ref=ref))
+
+
+def generate_workbook(path: Path, nb_rows: int) -> None:
+    """Classeur de production synthétique : nb_rows défauts, bypass et boutons répartis sur les modules."""
+    nb_modules = max(1, nb_rows // ROWS_PER_MODULE)
+    modules = [f"U{m:03d}" for m in range(nb_modules)]
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sommaire"
+    _add_table(
+        ws,
+        app.TABLE_SOMMAIRE,
+        [app.COL_SOMMAIRE_MODULE, app.COL_SOMMAIRE_NUM_MACHINE, app.COL_SOMMAIRE_NUM_MODULE,
+         app.COL_SOMMAIRE_NOM_LANGUE_1, app.COL_SOMMAIRE_NOM_LANGUE_2],
+        [[m, 1 + i // 10, i + 1, f"module {i}", f"unit {i}"] for i, m in enumerate(modules)],
+    )
+
+    for i, module in enumerate(modules):
+        ws = wb.create_sheet(module)
+        ws[app.CELL_EM_PREFIX] = module
+        _add_table(
+            ws,
+            f"{app.TABLE_DEFAULT_PREFIX}{i}",
+            [app.COL_DEFAUT_NUM, app.COL_DEFAUT_RESOLUTION_ARP, app.COL_DEFAUT_RESOLUTION_CLIENT],
+            [[f"{i} {r:04d}", f"Résolution ARP {i}-{r}", f"Client resolution {i}-{r}"] for r in range(ROWS_PER_MODULE)],
+        )
+
+    ws = wb.create_sheet("Recap")
+    headers = [app.COL_BYPASS_NUM, app.COL_BYPASS_NUM_MODULE, app.COL_BYPASS_DESIGNATION_ARP,
+               app.COL_BYPASS_DESIGNATION_CLIENT, app.COL_BYPASS_ALIAS, app.COL_BYPASS_ALIAS_EM, app.COL_BYPASS_CHECK]
+    rows = [[r + 1, modules[r % nb_modules], f"Shunt {r}", f"Bypass {r}", f"S{r}", f"SH{r}", 1] for r in range(nb_rows)]
+    _add_table(ws, app.TABLE_BYPASS, headers, rows)
+    rows = [[r + 1, modules[r % nb_modules], f"Bouton {r}", f"Button {r}", f"B{r}", f"BT{r}", 1] for r in range(nb_rows)]
+    _add_table(ws, app.TABLE_BUTTON, headers, rows, first_col=len(headers) + 2)
+
+    ws = wb.create_sheet("Prod")
+    _add_table(
+        ws,
+        app.TABLE_STATE,
+        [app.COL_STATE_MACHINE, app.COL_STATE_BIT, app.COL_STATE_NAME_FR, app.COL_STATE_NAME_EN,
+         app.COL_STATE_TYPE, app.COL_STATE_COLOR],
+        [[1, b, f"État {b}", f"State {b}", "run", "#00ff00"] for b in range(16)],
+    )
+
+    wb.save(path)
+
+
+def generate_recipes_db(path: Path, nb_recipes: int) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Format (IDFormat INTEGER PRIMARY KEY, Numero INTEGER, Actif INTEGER)")
+        conn.execute("CREATE TABLE TRAD_Format (IDFormat INTEGER, Langue INTEGER, Nom TEXT)")
+        conn.executemany("INSERT INTO Format VALUES (?, ?, ?)", [(i, i, i % 2) for i in range(nb_recipes)])
+        conn.executemany(
+            "INSERT INTO TRAD_Format VALUES (?, ?, ?)",
+            [(i, lang, f"Format {i} ({lang})") for i in range(nb_recipes) for lang in (0, 2)],
+        )
+    conn.close()
+
+
+# ============================================================
+# Mesure
+# ============================================================
+
+
+def measure(fn: Callable[..., Any], *args: Any) -> Tuple[Any, int]:
+    """Exécute fn et retourne (résultat, pic tracemalloc en octets au-dessus de l'existant)."""
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    return result, peak - current
+
+
+def _max_rss_kb() -> int:
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_size(nb_rows: int, work_dir: Path) -> Dict[str, int]:
+    excel_path = work_dir / f"bench_{nb_rows}.xlsx"
+    db_path = work_dir / f"bench_{nb_rows}.sqlite3"
+    out_dir = work_dir / f"out_{nb_rows}"
+    out_dir.mkdir(exist_ok=True)
+    generate_workbook(excel_path, nb_rows)
+    generate_recipes_db(db_path, nb_rows)
+
+    peaks: Dict[str, int] = {}
+    data, peaks["read_excel"] = measure(app.read_excel, excel_path)
+
+    wb = load_workbook(excel_path, data_only=True)
+    _, peaks["table_to_list"] = measure(app.table_to_list, wb["Recap"], app.TABLE_BYPASS)
+    wb.close()
+    del wb
+
+    num_lang = app.TRANSLATE["defaut"][app.LANGUAGE_EN]
+    _, peaks["export_defauts_csv"] = measure(app.export_defauts_csv, data["defauts"], num_lang, out_dir / "defaut.csv")
+    _, peaks["export_bypass_csv"] = measure(app.export_bypass_csv, data["bypass"], num_lang, out_dir / "bypass.csv")
+    _, peaks["export_button_csv"] = measure(app.export_button_csv, data["buttons"], num_lang, out_dir / "button.csv")
+
+    button_bypass, peaks["build_buttons_bypass"] = measure(app.build_buttons_bypass_json, data, 1)
+    _, peaks["json_buttons_bypass"] = measure(write_json, out_dir / "config_button_bypass.json", button_bypass)
+    del button_bypass
+
+    names = {cfg["num_machine"]: ("Machine", "Machine") for cfg in data["modules_cfg"].values()}
+    machines, peaks["build_machines"] = measure(app.build_machines, data["modules_cfg"], names)
+
+    rows = app.fetch_recipes(db_path)
+    recipes, peaks["build_recipes"] = measure(app.build_recipes, rows, app.TRANSLATE["bdd"][app.LANGUAGE_EN])
+    next(iter(machines.values()))["recipes"] = recipes
+
+    out = {"coms": [{"num": 1, "machines": list(machines.values())}]}
+    _, peaks["json_machines"] = measure(write_json, out_dir / "config_machines.json", out)
+
+    return peaks
+
+
+def _budget(stage: str, nb_rows: int) -> Tuple[int, str]:
+    """(nombre d'unités, nom de l'unité) du budget de l'étape pour nb_rows lignes."""
+    if stage in BUDGET_PER_MODULE:
+        return max(1, nb_rows // ROWS_PER_MODULE), "module"
+    return nb_rows, "ligne"
+
+
+def check(results: Dict[int, Dict[str, int]]) -> List[str]:
+    errors: List[str] = []
+    sizes = sorted(results)
+
+    for n in sizes:
+        for stage, peak in results[n].items():
+            units, _ = _budget(stage, n)
+            budget = {**BUDGET_PER_ROW, **BUDGET_PER_MODULE}[stage] * units
+            if peak > budget:
+                errors.append(f"{stage} n={n} : {peak} o > budget {budget} o")
+
+    # Pente = coût marginal par unité entre deux tailles successives (les frais fixes s'annulent)
+    for stage in results[sizes[0]]:
+        slopes = []
+        for n1, n2 in zip(sizes, sizes[1:]):
+            (u1, unit), (u2, _) = _budget(stage, n1), _budget(stage, n2)
+            if u2 > u1:
+                slopes.append((n1, n2, (results[n2][stage] - results[n1][stage]) / (u2 - u1), unit))
+        if not slopes:
+            continue
+        reference = max(slopes[0][2], MIN_SLOPE)
+        for n1, n2, slope, unit in slopes[1:]:
+            if slope > GROWTH_TOLERANCE * reference:
+                errors.append(
+                    f"{stage} : croissance plus que linéaire ({slope:.0f} o/{unit} entre n={n1} et n={n2}, "
+                    f"{slopes[0][2]:.0f} o/{unit} sur le premier intervalle)"
+                )
+
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vérifie les budgets mémoire du pipeline de production.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    results: Dict[int, Dict[str, int]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sorted(args.sizes):
+            results[n] = run_size(n, Path(tmp))
+            stages = "  ".join(f"{k}={v // 1024}k" for k, v in results[n].items())
+            print(f"n={n:>6}  rss_max={_max_rss_kb() // 1024}M  {stages}")
+    tracemalloc.stop()
+
+    errors = check(results)
+    for e in errors:
+        print("ÉCHEC", e)
+    if errors:
+        sys.exit(1)
+    print("Budgets mémoire respectés.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.formatting.rule import CellIsRule, ColorScaleRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.worksheet.datavalidation import DataValidation
+
+import set_prod_app as app
+from bench_memory import generate_workbook, measure
+from xlsx_index import index_path_for
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+DEFAULT_ROWS = 2000
+DEFAULT_REPEAT = 3
+VBA_SIZE = 4 * 1024 * 1024
+MEDIA_COUNT = 20
+MEDIA_SIZE = 256 * 1024
+STYLE_VARIANTS = 200
+
+# Parties qui ne doivent jamais être lues en mode valeurs seules
+SKIPPED_PARTS = ("xl/styles.xml", "xl/vbaProject.bin", "xl/media/", "xl/drawings/")
+# ... ni avec un index à jour
+INDEXED_PARTS = ("xl/tables/", "xl/worksheets/_rels/")
+
+XLSM_CONTENT_TYPE = "application/vnd.ms-excel.sheet.macroEnabled.main+xml"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"
+
+
+# ============================================================
+# Génération d'un classeur "lourd" (styles, mises en forme conditionnelles, macros, images)
+# ============================================================
+
+
+def _decorate(path: Path) -> None:
+    """Ajoute à chaque feuille des styles variés, des mises en forme conditionnelles et des validations."""
+    wb = load_workbook(path)
+    for ws in wb.worksheets:
+        for i, row in enumerate(ws.iter_rows(min_row=6)):
+            font = Font(bold=i % 2 == 0, color=f"{(i * 7919) % STYLE_VARIANTS:06X}")
+            fill = PatternFill("solid", fgColor=f"{(i * 104729) % STYLE_VARIANTS:06X}")
+            for cell in row:
+                cell.font = font
+                cell.fill = fill
+        ref = f"A6:G{max(ws.max_row, 6)}"
+        ws.conditional_formatting.add(ref, ColorScaleRule(start_type="min", start_color="FF0000",
+                                                          end_type="max", end_color="00FF00"))
+        ws.conditional_formatting.add(ref, CellIsRule(operator="equal", formula=["0"], font=Font(color="FF0000")))
+        dv = DataValidation(type="whole", operator="between", formula1="0", formula2="99999")
+        ws.add_data_validation(dv)
+        dv.add(ref)
+    wb.save(path)
+
+
+def generate_heavy_xlsm(path: Path, nb_rows: int) -> None:
+    """Classeur .xlsm synthétique : tables de bench_memory + styles, vbaProject.bin et images (octets aléatoires)."""
+    xlsx = path.with_suffix(".xlsx")
+    generate_workbook(xlsx, nb_rows)
+    _decorate(xlsx)
+
+    with zipfile.ZipFile(xlsx) as src, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            content = src.read(item.filename)
+            if item.filename == "[Content_Types].xml":
+                content = content.replace(XLSX_CONTENT_TYPE.encode(), XLSM_CONTENT_TYPE.encode())
+                content = content.replace(
+                    b"</Types>",
+                    b'<Default Extension="bin" ContentType="application/vnd.ms-office.vbaProject"/>'
+                    b'<Default Extension="png" ContentType="image/png"/></Types>',
+                )
+            dst.writestr(item, content)
+        dst.writestr("xl/vbaProject.bin", os.urandom(VBA_SIZE))
+        for i in range(MEDIA_COUNT):
+            dst.writestr(f"xl/media/image{i + 1}.png", os.urandom(MEDIA_SIZE))
+    xlsx.unlink()
+
+
+# ============================================================
+# Mesure
+# ============================================================
+
+
+class _PartsSpy:
+    """Enregistre les parties du zip ouvertes pendant la lecture."""
+
+    def __init__(self):
+        self.opened: Set[str] = set()
+        self._open = zipfile.ZipFile.open
+
+    def __enter__(self):
+        spy = self
+
+        def _open(zf, name, *args, **kwargs):
+            spy.opened.add(name if isinstance(name, str) else name.filename)
+            return spy._open(zf, name, *args, **kwargs)
+
+        zipfile.ZipFile.open = _open
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        zipfile.ZipFile.open = self._open
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> Tuple[Any, float, int]:
+    """(résultat, meilleur temps en s, pic tracemalloc en octets du dernier passage)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    _, peak = measure(fn)
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def run(nb_rows: int, repeat: int, work_dir: Path) -> List[str]:
+    excel_path = work_dir / f"heavy_{nb_rows}.xlsm"
+    generate_heavy_xlsm(excel_path, nb_rows)
+    print(f"Classeur : {excel_path.name}, {excel_path.stat().st_size // 1024} Ko, {nb_rows} lignes par table")
+
+    def full() -> Dict[str, Any]:
+        return app.read_excel(excel_path, log=lambda *a: None, values_only=False)
+
+    def values() -> Dict[str, Any]:
+        return app.read_excel(excel_path, log=lambda *a: None, values_only=True, table_index=False)
+
+    def indexed() -> Dict[str, Any]:
+        return app.read_excel(excel_path, log=lambda *a: None, values_only=True, table_index=True)
+
+    indexed()  # écrit l'index
+    if not index_path_for(excel_path).is_file():
+        return ["index des tables non écrit"]
+
+    errors: List[str] = []
+    reference = None
+    for name, fn in (("chargement complet", full), ("valeurs seules", values), ("valeurs + index", indexed)):
+        with _PartsSpy() as spy:
+            data, best, peak = timed(fn, repeat)
+        print(f"{name:<20} {best * 1000:>8.0f} ms  pic {peak // 1024:>7} Ko")
+
+        if reference is None:
+            reference = data
+        elif data != reference:
+            errors.append(f"{name} : données différentes du chargement complet")
+
+        if fn is not full:
+            skipped = SKIPPED_PARTS + (INDEXED_PARTS if fn is indexed else ())
+            read = sorted(p for p in spy.opened if p.startswith(skipped))
+            if read:
+                errors.append(f"{name} : parties lues à tort : {', '.join(read)}")
+
+    return errors
+
+
+# ============================================================
+# Main
+# ============================================================
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare la lecture complète (openpyxl) et la lecture des valeurs seules d'un .xlsm chargé."
+    )
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        errors = run(args.rows, args.repeat, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for e in errors:
+        print("ÉCHEC", e)
+    if errors:
+        sys.exit(1)
+    print("Lecture des valeurs seules conforme.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+_CONVERSION_ERRORS = (TypeError, ValueError, OverflowError)
+
+
+# ============================================================
+# Colonnes typées
+# ============================================================
+
+
+class Column:
+    """Colonne convertie en une passe.
+
+    values[i] : valeur convertie (None si vide ou invalide), valid[i] : conversion réussie,
+    errors : [(index, valeur brute)] des valeurs invalides, dans l'ordre des lignes (vides comprises si la
+    colonne est obligatoire), pour signaler toutes les erreurs en une passe.
+    """
+
+    __slots__ = ("values", "valid", "errors")
+
+    def __init__(self, values: List[Any], valid: List[bool], errors: List[Tuple[int, Any]]):
+        self.values = values
+        self.valid = valid
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _to_code(v: Any) -> int:
+    """Codes défaut "12 3456" : int(str(v).replace(" ", ""))."""
+    return int(str(v).replace(" ", ""))
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "int": int,
+    "code": _to_code,
+    "float": float,
+}
+
+
+def _coerce_cells(values: Sequence[Any], convert: Callable[[Any], Any], required: bool) -> Column:
+    """Conversion cellule par cellule : seulement si la colonne contient une valeur invalide."""
+    out: List[Any] = []
+    valid: List[bool] = []
+    errors: List[Tuple[int, Any]] = []
+
+    for i, v in enumerate(values):
+        c = None
+        if v is None:
+            if required:
+                errors.append((i, v))
+        else:
+            try:
+                c = convert(v)
+            except _CONVERSION_ERRORS:
+                errors.append((i, v))
+        out.append(c)
+        valid.append(c is not None)
+
+    return Column(out, valid, errors)
+
+
+def coerce_column(values: Sequence[Any], kind: str, required: bool = False) -> Column:
+    """Convertit toute une colonne ("int", "code" ou "float") avec les règles de int() / float() ;
+    None reste None (invalide, et dans errors seulement si required).
+
+    Cas normal (aucune valeur invalide) : une seule conversion de toute la colonne ; à la première
+    exception, la colonne est reprise cellule par cellule pour localiser les erreurs.
+    """
+    convert = CONVERTERS[kind]
+    has_empty = None in values
+    if has_empty and required:
+        return _coerce_cells(values, convert, required)
+    try:
+        if has_empty:
+            out = [None if v is None else convert(v) for v in values]
+        else:
+            out = list(map(convert, values))
+    except _CONVERSION_ERRORS:
+        return _coerce_cells(values, convert, required)
+    return Column(out, [v is not None for v in values], [])
+
+
+def coerce_rows(
+    rows: Sequence[Dict[str, Any]], columns: Dict[str, str], default: Any = None, required: bool = False
+) -> Dict[str, Column]:
+    """Convertit plusieurs colonnes d'une table (liste de dicts) : {colonne: type} -> {colonne: Column}."""
+    return {
+        col: coerce_column([r.get(col, default) for r in rows], kind, required) for col, kind in columns.items()
+    }
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+HASH_CHUNK_SIZE = 1 << 16
+
+
+# ============================================================
+# Écriture atomique (remplace le fichier seulement s'il change)
+# ============================================================
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_chunks(path: Path, chunks: Iterable[str], encoding: str = "utf-8") -> bool:
+    """Écrit les morceaux dans un fichier temporaire puis remplace path de façon atomique.
+
+    Les fins de ligne sont converties comme Path.write_text (os.linesep). Si le contenu est
+    identique au fichier existant, celui-ci n'est pas touché (mtime conservé).
+    Retourne True si le fichier a été (ré)écrit.
+    """
+    path = Path(path)
+    h = hashlib.sha256()
+    size = 0
+
+    # Pas de tempfile.mkstemp : il crée en 0600, on veut les droits par défaut (umask) comme write_text
+    tmp_name = str(path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp"))
+    try:
+        with open(tmp_name, "xb") as f:
+            for chunk in chunks:
+                if os.linesep != "\n":
+                    chunk = chunk.replace("\n", os.linesep)
+                data = chunk.encode(encoding)
+                h.update(data)
+                size += len(data)
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if path.is_file() and path.stat().st_size == size and _file_digest(path) == h.hexdigest():
+            os.unlink(tmp_name)
+            return False
+
+        os.replace(tmp_name, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def write_text(path: Path, text: str, encoding: str = "utf-8") -> bool:
+    return write_chunks(path, (text,), encoding)
+
+
+def write_lines(path: Path, lines: Iterable[str], encoding: str = "utf-8") -> bool:
+    """Équivalent de path.write_text("\\n".join(lines) + "\\n") : "\\n" seul si aucune ligne."""
+
+    def chunks() -> Iterator[str]:
+        empty = True
+        for line in lines:
+            empty = False
+            yield line + "\n"
+        if empty:
+            yield "\n"
+
+    return write_chunks(path, chunks(), encoding)
+
+
+def write_json(path: Path, obj: Any) -> bool:
+    """Équivalent de path.write_text(json.dumps(obj, ensure_ascii=False, indent=2)), en flux."""
+    return write_chunks(path, json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(obj))
+
+
+def print_output_report(results: Dict[Path, bool]) -> None:
+    changed = [p for p, c in results.items() if c]
+    unchanged = [p for p, c in results.items() if not c]
+    if changed:
+        print("Fichiers modifiés :", ", ".join(Path(p).name for p in changed))
+    if unchanged:
+        print("Fichiers inchangés :", ", ".join(Path(p).name for p in unchanged))
@@ -0,0 +1,102 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+
+# ============================================================
+# Étapes (DAG) et exécution concurrente
+# ============================================================
+
+
+class Stage:
+    """Étape nommée : fn(**inputs) -> sortie (ou tuple de sorties si plusieurs noms déclarés).
+
+    output_path : fichier écrit par l'étape, dont la sortie est alors "fichier modifié ?" (bool).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        outputs: Optional[Sequence[str]] = None,
+        output_path: Optional[Path] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs is not None else (name,)
+        self.output_path = output_path
+
+    def run(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.fn(**{k: values[k] for k in self.inputs})
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+
+class StageSkipped(Exception):
+    pass
+
+
+def _check_graph(stages: Iterable[Stage], available: Iterable[str]) -> None:
+    producers: Dict[str, str] = {}
+    for stage in stages:
+        for out in stage.outputs:
+            if out in producers:
+                raise ValueError(f"Sortie '{out}' produite par '{producers[out]}' et '{stage.name}'.")
+            producers[out] = stage.name
+
+    known = set(available) | set(producers)
+    for stage in stages:
+        missing = [i for i in stage.inputs if i not in known]
+        if missing:
+            raise ValueError(f"Étape '{stage.name}' : entrées inconnues {missing}.")
+
+
+def run_stages(
+    stages: List[Stage], values: Dict[str, Any], max_workers: Optional[int] = None
+) -> Dict[str, BaseException]:
+    """Exécute chaque étape dès que ses entrées sont disponibles, les étapes indépendantes en parallèle.
+
+    values contient les entrées initiales et est complété avec les sorties des étapes.
+    Une étape en erreur n'arrête que les étapes qui en dépendent (StageSkipped).
+    Retourne {nom d'étape: exception} pour les étapes en échec ou ignorées.
+    """
+    _check_graph(stages, values)
+
+    errors: Dict[str, BaseException] = {}
+    failed_outputs: Dict[str, str] = {}
+    pending = list(stages)
+    running: Dict[Future, Stage] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            still_pending = []
+            for stage in pending:
+                blocked_by = next((failed_outputs[i] for i in stage.inputs if i in failed_outputs), None)
+                if blocked_by is not None:
+                    errors[stage.name] = StageSkipped(f"dépend de l'étape en échec '{blocked_by}'")
+                    failed_outputs.update({o: blocked_by for o in stage.outputs})
+                elif all(i in values for i in stage.inputs):
+                    running[pool.submit(stage.run, values)] = stage
+                else:
+                    still_pending.append(stage)
+            pending = still_pending
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Dépendances circulaires : {[s.name for s in pending]}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    values.update(future.result())
+                except Exception as e:
+                    errors[stage.name] = e
+                    failed_outputs.update({o: stage.name for o in stage.outputs})
+
+    return errors
+
@@ -0,0 +1,118 @@
+import argparse
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+from xlsx_parts import REL_TYPE_TABLE, WORKBOOK_PART, read_rels, read_table_def, rels_path, sheet_parts
+
+# (nom de table ou préfixe, est un préfixe ?, obligatoire ?, colonnes attendues)
+TableRule = Tuple[str, bool, bool, Sequence[str]]
+
+
+# ============================================================
+# Vérification rapide (définitions de tables + en-têtes uniquement)
+# ============================================================
+
+
+def scan_tables(excel_path: Path) -> Optional[Tuple[Dict[str, Tuple[str, List[str]]], List[str]]]:
+    """(table -> (feuille, en-têtes), problèmes), lu dans les parties XML des tables sans charger les feuilles.
+
+    None si le fichier n'est pas un classeur zip (xls). Une partie XML corrompue (relations d'une feuille,
+    définition d'une table) est signalée dans les problèmes et les autres tables sont quand même lues.
+    """
+    try:
+        with zipfile.ZipFile(excel_path) as zf:
+            tables: Dict[str, Tuple[str, List[str]]] = {}
+            problems: List[str] = []
+            try:
+                sheets = sheet_parts(zf)
+            except ElementTree.ParseError as e:
+                return tables, [f"Classeur corrompu (XML illisible dans {WORKBOOK_PART} ou ses relations) : {e}"]
+
+            for sheet_name, sheet_part in sheets:
+                try:
+                    table_parts = [part for _, part in read_rels(zf, sheet_part, REL_TYPE_TABLE)]
+                except ElementTree.ParseError as e:
+                    problems.append(f"Feuille '{sheet_name}' : relations illisibles ({rels_path(sheet_part)}) : {e}")
+                    continue
+                for part in table_parts:
+                    try:
+                        name, _, headers = read_table_def(zf, part)
+                    except ElementTree.ParseError as e:
+                        problems.append(f"Feuille '{sheet_name}' : définition de table illisible ({part}) : {e}")
+                        continue
+                    tables[name] = (sheet_name, headers)
+            return tables, problems
+    except (OSError, zipfile.BadZipFile, KeyError):
+        return None
+
+
+def check_tables(tables: Dict[str, Tuple[str, List[str]]], rules: Sequence[TableRule]) -> List[str]:
+    problems: List[str] = []
+
+    for pattern, is_prefix, required, columns in rules:
+        matching = [t for t in tables if (t.startswith(pattern) if is_prefix else t == pattern)]
+        if not matching:
+            if required:
+                problems.append(f"Table {pattern}{'*' if is_prefix else ''} introuvable.")
+            continue
+
+        for table_name in matching:
+            sheet_name, headers = tables[table_name]
+            missing = [c for c in columns if c not in headers]
+            if missing:
+                problems.append(
+                    f"Feuille '{sheet_name}', table {table_name} : colonne(s) manquante(s) {', '.join(missing)}"
+                )
+
+    return problems
+
+
+def preflight(excel_path: Path, rules: Sequence[TableRule]) -> List[str]:
+    """Liste de tous les problèmes détectés (vide si le classeur est conforme ou non vérifiable)."""
+    scanned = scan_tables(excel_path)
+    if scanned is None:
+        return []
+    tables, problems = scanned
+    return problems + check_tables(tables, rules)
+
+
+def print_problems(problems: List[str]) -> None:
+    print(f"{len(problems)} problème(s) détecté(s) dans le classeur :")
+    for p in problems:
+        print(" -", p)
+
+
+# ============================================================
+# Main
+# ============================================================
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vérifie les tables et en-têtes d'un classeur sans le charger.")
+    parser.add_argument("excel")
+    parser.add_argument("--diag", action="store_true", help="règles de set_diag_app au lieu de set_prod_app")
+    args = parser.parse_args()
+
+    if args.diag:
+        from set_diag_app import PREFLIGHT_RULES
+    else:
+        from set_prod_app import PREFLIGHT_RULES
+
+    start = time.perf_counter()
+    problems = preflight(Path(args.excel), PREFLIGHT_RULES)
+    elapsed = time.perf_counter() - start
+
+    if problems:
+        print_problems(problems)
+    else:
+        print("Aucun problème détecté.")
+    print(f"Vérification en {elapsed * 1000:.0f} ms")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
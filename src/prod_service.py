@@ -0,0 +1,298 @@
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Tuple
+
+from openpyxl.utils.exceptions import InvalidFileException
+
+import awm_import
+import set_prod_app as app
+from output_writer import write_json, write_lines
+
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+CACHE_MAX_ENTRIES = 16
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+# ============================================================
+# Verrous par clé
+# ============================================================
+
+
+class KeyedLocks:
+    """Un verrou par clé (fichier, dossier de sortie...), retiré dès que plus personne ne l'utilise."""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, List[Any]] = {}  # clé -> [verrou, nombre d'utilisateurs]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locks)
+
+
+# ============================================================
+# Cache LRU (invalidation par mtime)
+# ============================================================
+
+
+def _approx_size(obj: Any) -> int:
+    """Estimation grossière de l'empreinte mémoire d'une structure dict/list."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_approx_size(v) for v in obj)
+    return size
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+class FileCache:
+    """Cache LRU de résultats calculés à partir d'un fichier.
+
+    Une entrée est invalidée dès que le mtime/la taille du fichier change. Les calculs
+    sur des fichiers différents se font en parallèle ; deux requêtes sur le même fichier
+    attendent le même calcul.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+        self._key_locks = KeyedLocks()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+    def get(self, path: Path, compute: Callable[[Path], Any], key: Hashable = None) -> Any:
+        key = (str(path), key)
+        with self._key_locks.hold(key):
+            stamp = _file_stamp(path)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+
+            value = compute(path)
+            size = _approx_size(value)
+
+            with self._lock:
+                self._discard(key)
+                if size <= self.max_bytes:
+                    self._entries[key] = (stamp, value, size)
+                    self._bytes += size
+                    self._evict()
+            return value
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+WORKBOOKS = FileCache()
+RECIPES = FileCache()
+
+# Un seul jeu de fichiers écrit à la fois par dossier de sortie
+OUT_DIR_LOCKS = KeyedLocks()
+
+
+# ============================================================
+# Pipeline (sans input())
+# ============================================================
+
+
+class RequestError(Exception):
+    pass
+
+
+def _excel_path(params: Dict[str, Any]) -> Path:
+    if not params.get("excel"):
+        raise RequestError("Paramètre 'excel' manquant.")
+    path = Path(params["excel"]).resolve()
+    if not path.is_file():
+        raise RequestError(f"Le fichier n'existe pas : {path}")
+    if path.suffix.lower() not in app.EXCEL_SUFFIXES:
+        raise RequestError(f"Le fichier n'est pas un classeur ({', '.join(app.EXCEL_SUFFIXES)}) : {path}")
+    return path
+
+
+def _lang(params: Dict[str, Any]) -> str:
+    lang = params.get("lang", app.LANGUAGE_EN)
+    if lang not in app.TRANSLATE["defaut"]:
+        raise RequestError(f"Langue inconnue : {lang}")
+    return lang
+
+
+def _out_dir(params: Dict[str, Any], excel_path: Path) -> Path:
+    """Dossier out_dir de la requête, sinon un dossier propre au classeur : out/<nom>_<empreinte du chemin>."""
+    if params.get("out_dir"):
+        out_dir = Path(params["out_dir"]).resolve()
+    else:
+        digest = hashlib.sha1(str(excel_path).encode("utf-8")).hexdigest()[:8]
+        out_dir = (app.OUT_DIR / f"{excel_path.stem}_{digest}").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir
+
+
+def _workbook(excel_path: Path) -> Dict[str, Any]:
+    """Données du classeur en cache (jamais modifiées par awm_import)."""
+    return WORKBOOKS.get(excel_path, awm_import.load)
+
+
+def _cached_recipes(db_path: Path) -> List[Tuple[Any, Any, Any, Any]]:
+    return RECIPES.get(db_path.resolve(), app.fetch_recipes)
+
+
+def handle_parse(params: Dict[str, Any]) -> Dict[str, Any]:
+    data = _workbook(_excel_path(params))
+    return {
+        "counts": {k: len(v) for k, v in data.items()},
+        "modules_cfg": data["modules_cfg"],
+    }
+
+
+def handle_texts(params: Dict[str, Any]) -> Dict[str, Any]:
+    excel_path = _excel_path(params)
+    data = _workbook(excel_path)
+    out_dir = _out_dir(params, excel_path)
+    registry = awm_import.text_id_registry(dedupe=bool(params.get("dedupe")))
+    lines_by_file = awm_import.text_lines(data, _lang(params), registry)
+    with OUT_DIR_LOCKS.hold(out_dir):
+        changed = {name: write_lines(out_dir / name, lines) for name, lines in lines_by_file.items()}
+    return {"out_dir": str(out_dir), "changed": changed, "text_id_problems": registry.problems()}
+
+
+def handle_machines(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Construit config_button_bypass.json et config_machines.json.
+
+    Paramètres : excel, lang, num_com, names {num_machine: [nom_1, nom_2]}, recipes {num_machine: chemin_bdd},
+    modules {module: {num_machine, num_module}} pour les modules absents du sommaire, out_dir.
+    """
+    excel_path = _excel_path(params)
+    data = _workbook(excel_path)
+    lang = _lang(params)
+    out_dir = _out_dir(params, excel_path)
+    num_com = int(params.get("num_com", 1))
+    modules = params.get("modules")
+    names = {int(k): tuple(v) for k, v in (params.get("names") or {}).items()}
+    recipes_dbs = {int(k): Path(v) for k, v in (params.get("recipes") or {}).items()}
+
+    j = awm_import.button_bypass_config(data, num_com, modules)
+    out = awm_import.machines_config(data, lang, num_com, names, recipes_dbs, modules, fetch_recipes=_cached_recipes)
+    with OUT_DIR_LOCKS.hold(out_dir):
+        changed = {
+            "config_button_bypass.json": write_json(out_dir / "config_button_bypass.json", j),
+            "config_machines.json": write_json(out_dir / "config_machines.json", out),
+        }
+    return {"out_dir": str(out_dir), "changed": changed, "machines": out}
+
+
+ROUTES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "/parse": handle_parse,
+    "/texts": handle_texts,
+    "/machines": handle_machines,
+}
+
+
+# ============================================================
+# Serveur HTTP
+# ============================================================
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path == "/stats":
+            self._reply(200, {"workbooks": WORKBOOKS.stats(), "recipes": RECIPES.stats()})
+        else:
+            self._reply(404, {"error": f"Route inconnue : {self.path}"})
+
+    def do_POST(self) -> None:
+        route = ROUTES.get(self.path)
+        if route is None:
+            self._reply(404, {"error": f"Route inconnue : {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            self._reply(200, route(params))
+        except (
+            RequestError, awm_import.MissingModulesError, InvalidFileException, zipfile.BadZipFile,
+            OSError, ValueError, KeyError, TypeError,
+        ) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Service AWM import à l'écoute sur http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Service local de génération des imports AWM (production).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import json
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from openpyxl import load_workbook
 
+from coercion import coerce_column
+from output_writer import print_output_report, write_lines
+from preflight import preflight, print_problems
+from sqlite_bundle import BUNDLE_NAME, write_motors_bundle
+from xlsx_values import VALUES_ONLY_SUFFIXES, values_worksheets
+
 # ============================================================
 # Constantes / Config
 # ============================================================
@@ -18,6 +24,19 @@ COL_MOTOR_TYPE = "Type"
 MOTOR_TYPE_TO_KEEP = "MB"
 MOTOR_PREFIX_TO_ADD = "V"
 
+# Vérification préalable : (table ou préfixe, préfixe ?, obligatoire ?, colonnes utilisées par l'export)
+PREFLIGHT_RULES = [
+    (TABLE_MOTOR_PREFIX, True, True, (COL_MOTOR_AXNAME, COL_MOTOR_GEAR, COL_MOTOR_FEED_CST, COL_MOTOR_TYPE)),
+]
+
+# Écrit aussi les moteurs dans out/awm_bundle.sqlite3 (table motors du bundle production)
+EXPORT_SQLITE_BUNDLE = False
+
+# Lecture plus rapide (optionnelle) : les .xlsx/.xlsm sont lus directement dans le zip (valeurs et tables)
+# sans styles, dessins ni VBA. Avec perte : une cellule au format date est lue comme un numéro de série Excel
+# (int ou float) au lieu d'un datetime.
+READ_VALUES_ONLY = False
+
 # CSV columns
 COL_CSV_AXNAME = "axname"
 COL_CSV_GEAR = "refGearBox"
@@ -66,13 +85,16 @@ def table_to_list(ws, table_name: str, wanted_columns: Optional[Iterable[str]] =
 
 def read_excel(excel_path: Path) -> Dict[str, Any]:
     """Lit toutes les feuilles et récupère : moteurs"""
-    wb = load_workbook(excel_path, data_only=True)
+    if READ_VALUES_ONLY and excel_path.suffix.lower() in VALUES_ONLY_SUFFIXES:
+        worksheets = values_worksheets(excel_path)
+    else:
+        worksheets = load_workbook(excel_path, data_only=True).worksheets
 
     data = {
         "motors": [],
     }
 
-    for ws in wb.worksheets:
+    for ws in worksheets:
         tables_in_sheet = list(ws.tables.keys())
 
         # Moteurs
@@ -123,11 +145,9 @@ def ask_excel_file() -> Optional[Path]:
 def _csv_line(*values: Any) -> str:
     return ";".join(str(v) for v in values) + ";"
 
-def export_motors_csv(motors: List[Dict[str, Any]], out_path: Path) -> None:
-    lines: List[str] = []
-
-    lines.append(_csv_line(COL_CSV_AXNAME, COL_CSV_GEAR, COL_CSV_FEED_CONSTANT))
-
+def motor_rows(motors: List[Dict[str, Any]]) -> Iterator[Tuple[str, Any, float]]:
+    """(axname, réducteur, feed constant) des moteurs à exporter."""
+    kept: List[Tuple[str, Any, Any]] = []
     for m in motors:
         mtype = m.get(COL_MOTOR_TYPE)
         if mtype is None:
@@ -142,16 +162,27 @@ def export_motors_csv(motors: List[Dict[str, Any]], out_path: Path) -> None:
         if gear is None:
             print(f"Réducteur manquant pour {axname} => non généré.")
             continue
-        feed_cst = m.get(COL_MOTOR_FEED_CST)
-        try:
-            feed_cst_float = float(feed_cst)
-        except (ValueError, TypeError):
-            print(f"Feed constant invalide pour {axname} : {feed_cst} => non généré.")
-            continue
+        kept.append((axname, gear, m.get(COL_MOTOR_FEED_CST)))
+
+    # Feed constants des moteurs retenus, converties en une passe
+    feed_csts = coerce_column([feed_cst for _, _, feed_cst in kept], "float", required=True)
+    for i, feed_cst in feed_csts.errors:
+        print(f"Feed constant invalide pour {kept[i][0]} : {feed_cst} => non généré.")
+
+    for (axname, gear, _), feed_cst_float, valid in zip(kept, feed_csts.values, feed_csts.valid):
+        if valid:
+            yield axname, gear, feed_cst_float
+
+def export_motors_csv(rows: Iterable[Tuple[str, Any, float]], out_path: Path) -> bool:
+    """Écrit motor.csv à partir des lignes de motor_rows."""
+    lines: List[str] = []
 
+    lines.append(_csv_line(COL_CSV_AXNAME, COL_CSV_GEAR, COL_CSV_FEED_CONSTANT))
+
+    for axname, gear, feed_cst_float in rows:
         lines.append(_csv_line(axname, gear, feed_cst_float))
 
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return write_lines(out_path, lines)
 
 # ============================================================
 # Main
@@ -161,13 +192,21 @@ def main() -> None:
     excel_path = ask_excel_file()
     if not excel_path:
         return
-    
+
+    problems = preflight(excel_path, PREFLIGHT_RULES)
+    if problems:
+        print_problems(problems)
+
     print("Lecture du fichier Excel...")
     data = read_excel(excel_path)
 
     # Exports CSV
     print("Export des CSV...")
-    export_motors_csv(data["motors"], OUT_DIR / "motor.csv")
+    rows = list(motor_rows(data["motors"]))  # avertissements affichés une seule fois
+    print_output_report({OUT_DIR / "motor.csv": export_motors_csv(rows, OUT_DIR / "motor.csv")})
+    if EXPORT_SQLITE_BUNDLE:
+        write_motors_bundle(OUT_DIR / BUNDLE_NAME, rows)
+        print("Bundle SQLite écrit :", BUNDLE_NAME)
 
 
 if __name__ == "__main__":
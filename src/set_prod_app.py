@@ -1,10 +1,18 @@
-import json
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from openpyxl import load_workbook
 
+from coercion import coerce_column, coerce_rows
+from output_writer import print_output_report, write_json, write_lines
+from pipeline import Stage, run_stages
+from preflight import preflight, print_problems
+from sqlite_bundle import BUNDLE_NAME, write_prod_bundle
+from text_ids import TextIdRegistry
+from xlsx_index import index_path_for
+from xlsx_values import VALUES_ONLY_SUFFIXES, values_worksheets
+
 
 # ============================================================
 # Constantes / Config
@@ -16,6 +24,31 @@ BASE_ID_BUTTON_DESCRIPTION = 2_00_02_000  # [2_00_02_000; 2_00_03_000[
 BASE_ID_BYPASS_TEXT = 2_00_03_000  # [2_00_03_000; 2_00_04_000[
 BASE_ID_BYPASS_DESCRIPTION = 2_00_04_000  # [2_00_04_000; 2_00_05_000[
 
+# base -> fin de plage (exclue), vérifié par le registre des IDs de textes
+TEXT_ID_RANGES = {
+    BASE_ID_FAULT_DESCRIPTION: 2_00_00_000,
+    BASE_ID_BUTTON_TEXT: 2_00_02_000,
+    BASE_ID_BUTTON_DESCRIPTION: 2_00_03_000,
+    BASE_ID_BYPASS_TEXT: 2_00_04_000,
+    BASE_ID_BYPASS_DESCRIPTION: 2_00_05_000,
+}
+# Retire des CSV les IDs en double (la première occurrence est conservée) ; sinon ils sont seulement signalés
+DEDUPE_TEXT_IDS = False
+
+# Écrit aussi toutes les données générées dans out/awm_bundle.sqlite3 (tables indexées)
+EXPORT_SQLITE_BUNDLE = False
+
+# Lecture plus rapide (optionnelle) : les .xlsx/.xlsm sont lus directement dans le zip (valeurs, tables, B3)
+# sans styles, dessins ni VBA. Avec perte : une cellule au format date est lue comme un numéro de série Excel
+# (int ou float) au lieu d'un datetime.
+READ_VALUES_ONLY = False
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm", ".xls")
+
+# Avec READ_VALUES_ONLY : écrit un index des tables à côté du classeur (<classeur>.awmidx.json), validé par les
+# CRC du zip ; tant que le classeur ne change pas, les lectures suivantes ne cherchent plus les tables
+TABLE_INDEX = False
+
 LANGUAGE_ARP = "arp"
 LANGUAGE_FR = "fr"
 LANGUAGE_EN = "en"
@@ -93,6 +126,31 @@ COL_CHART_NUM = "Chart"
 COL_CHART_COUNTER = "Counter"
 COL_CHART_COLOR = "Color"
 
+# Vérification préalable : (table ou préfixe, préfixe ?, obligatoire ?, colonnes utilisées par les exports)
+PREFLIGHT_RULES = [
+    (TABLE_SOMMAIRE, False, True, (COL_SOMMAIRE_MODULE, COL_SOMMAIRE_NUM_MACHINE, COL_SOMMAIRE_NUM_MODULE)),
+    (TABLE_DEFAULT_PREFIX, True, True, (COL_DEFAUT_NUM, COL_DEFAUT_RESOLUTION_ARP, COL_DEFAUT_RESOLUTION_CLIENT)),
+    (
+        TABLE_BYPASS,
+        False,
+        False,
+        (COL_BYPASS_NUM, COL_BYPASS_NUM_MODULE, COL_BYPASS_DESIGNATION_ARP, COL_BYPASS_DESIGNATION_CLIENT,
+         COL_BYPASS_CHECK),
+    ),
+    (TABLE_BYPASS_EM_PREFIX, True, False, (COL_BYPASS_ALIAS_EM_IN_EM, COL_BYPASS_CHECK)),
+    (
+        TABLE_BUTTON,
+        False,
+        False,
+        (COL_BUTTON_NUM, COL_BUTTON_NUM_MODULE, COL_BUTTON_DESIGNATION_ARP, COL_BUTTON_DESIGNATION_CLIENT,
+         COL_BUTTON_CHECK),
+    ),
+    (TABLE_BUTTON_EM_PREFIX, True, False, (COL_BUTTON_ALIAS_EM_IN_EM, COL_BUTTON_CHECK)),
+    (TABLE_STATE, False, False, (COL_STATE_MACHINE, COL_STATE_BIT, COL_STATE_NAME_FR, COL_STATE_NAME_EN)),
+    (TABLE_COUNTER, False, False, (COL_COUNTER_MACHINE, COL_COUNTER_NUM, COL_COUNTER_NAME_FR, COL_COUNTER_NAME_EN)),
+    (TABLE_CHART, False, False, (COL_CHART_MACHINE, COL_CHART_NUM, COL_CHART_COUNTER)),
+]
+
 # JSON keys
 JSON_BYPASS_NUM = "num"
 JSON_BYPASS_NUM_MACHINE = "num_machine"
@@ -108,8 +166,7 @@ JSON_BUTTON_ALIAS = "alias"
 # Création dossier de sortie
 # ============================================================
 
-OUT_DIR = Path("out")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+OUT_DIR = Path("out")  # créé par main() uniquement (pas à l'import par awm_import / prod_service)
 
 
 # ============================================================
@@ -148,9 +205,32 @@ def table_to_list(ws, table_name: str, wanted_columns: Optional[Iterable[str]] =
     return out
 
 
-def read_excel(excel_path: Path) -> Dict[str, Any]:
-    """Lit toutes les feuilles et récupère : defauts, bypass, buttons, modules_cfg."""
-    wb = load_workbook(excel_path, data_only=True)
+def read_excel(
+    excel_path: Path,
+    log: Callable[..., None] = print,
+    values_only: Optional[bool] = None,
+    table_index: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Lit toutes les feuilles et récupère : defauts, bypass, buttons, modules_cfg.
+
+    values_only (READ_VALUES_ONLY par défaut) : un .xlsx/.xlsm est lu directement dans le zip
+    (voir xlsx_values), sans openpyxl ; les dates sont alors des numéros de série.
+    table_index (TABLE_INDEX par défaut) : avec values_only, utilise / écrit l'index des tables (voir xlsx_index).
+    log reçoit les messages de progression (print par défaut).
+    """
+    if values_only is None:
+        values_only = READ_VALUES_ONLY
+    if table_index is None:
+        table_index = TABLE_INDEX
+
+    wb = None
+    if values_only and excel_path.suffix.lower() in VALUES_ONLY_SUFFIXES:
+        index_path = index_path_for(excel_path) if table_index else None
+        worksheets = values_worksheets(excel_path, cells=(CELL_EM_PREFIX,), index_path=index_path)
+    else:
+        wb = load_workbook(excel_path, data_only=True)
+        worksheets = wb.worksheets
+
     data = {
         "defauts": [],
         "bypass": [],
@@ -163,7 +243,7 @@ def read_excel(excel_path: Path) -> Dict[str, Any]:
         "charts": [],
     }
 
-    for ws in wb.worksheets:
+    for ws in worksheets:
 
         sheet_name = ws.title
 
@@ -171,24 +251,26 @@ def read_excel(excel_path: Path) -> Dict[str, Any]:
 
         tables_in_sheet = list(ws.tables.keys())
 
-        print(sheet_name, "-> tables:", tables_in_sheet)
+        log(sheet_name, "-> tables:", tables_in_sheet)
 
         # Sommaire -> modules_cfg
         if TABLE_SOMMAIRE in tables_in_sheet:
-            for item in table_to_list(ws, TABLE_SOMMAIRE):
+            items = table_to_list(ws, TABLE_SOMMAIRE)
+            cols = coerce_rows(items, {COL_SOMMAIRE_NUM_MACHINE: "int", COL_SOMMAIRE_NUM_MODULE: "int"}, required=True)
+            nums_machine, nums_module = cols[COL_SOMMAIRE_NUM_MACHINE], cols[COL_SOMMAIRE_NUM_MODULE]
+            for i in sorted({i for i, _ in nums_machine.errors + nums_module.errors}):
+                module = items[i].get(COL_SOMMAIRE_MODULE)
+                if module is not None:
+                    log(f"Erreur conversion num_machine/num_module pour module {module}")
+
+            for i, item in enumerate(items):
                 module = item.get(COL_SOMMAIRE_MODULE)
-                if module is None:
-                    continue
-                try:
-                    num_machine = int(item.get(COL_SOMMAIRE_NUM_MACHINE))
-                    num_module = int(item.get(COL_SOMMAIRE_NUM_MODULE))
-                except (TypeError, ValueError):
-                    print(f"Erreur conversion num_machine/num_module pour module {module}")
+                if module is None or not (nums_machine.valid[i] and nums_module.valid[i]):
                     continue
 
                 data["modules_cfg"][module] = {
-                    "num_machine": num_machine,
-                    "num_module": num_module,
+                    "num_machine": nums_machine.values[i],
+                    "num_module": nums_module.values[i],
                     "nom_langue_1": item.get(COL_SOMMAIRE_NOM_LANGUE_1, "") or "",
                     "nom_langue_2": item.get(COL_SOMMAIRE_NOM_LANGUE_2, "") or "",
                 }
@@ -233,6 +315,9 @@ def read_excel(excel_path: Path) -> Dict[str, Any]:
                     continue
                 data["buttons_em"][sheet_em][row[COL_BUTTON_ALIAS_EM_IN_EM]] = row
 
+    if wb is not None:
+        wb.close()
+
     # Complete buttons and bypass with EM data when possible
     # Description is missing in the main tables but present in the EM tables, so we add it if we can find it via the alias/module
     for b in data["bypass"]:
@@ -294,7 +379,7 @@ def ask_path(prompt: str, allowed_suffixes: Tuple[str, ...]) -> Optional[Path]:
 
 
 def ask_excel_file() -> Optional[Path]:
-    return ask_path("Chemin du fichier Excel : ", (".xlsx", ".xlsm", ".xls"))
+    return ask_path("Chemin du fichier Excel : ", EXCEL_SUFFIXES)
 
 
 def ask_bdd_file() -> Optional[Path]:
@@ -345,88 +430,146 @@ def ask_language() -> str:
 # ============================================================
 
 
+# (base BASE_ID_*, num_text, texte, ligne source)
+TextEntry = Tuple[int, int, Optional[str], str]
+
+
 def _csv_line(num_text: int, text: Optional[str]) -> str:
     safe = (text or "").replace('"', '""')  # escape simple CSV-like
     return f'{num_text}:"{safe}";'
 
 
-def export_defauts_csv(defauts: List[Dict[str, Any]], num_lang: int, out_path: Path) -> None:
-    lines: List[str] = []
+def csv_lines(texts: Iterable[TextEntry]) -> Iterator[str]:
+    """Lignes CSV des textes."""
+    for _, num_text, text, _ in texts:
+        yield _csv_line(num_text, text)
 
-    for d in defauts:
-        code = d.get(COL_DEFAUT_NUM)
-        if code is None:
-            continue
 
-        try:
-            id_ = int(str(code).replace(" ", ""))
-        except ValueError:
-            print(f"Code défaut invalide : {code}")
+def defaut_texts(defauts: List[Dict[str, Any]], num_lang: int) -> Iterator[TextEntry]:
+    codes = [d.get(COL_DEFAUT_NUM) for d in defauts]
+    ids = coerce_column(codes, "code")
+    for _, code in ids.errors:
+        print(f"Code défaut invalide : {code}")
+
+    for i, d in enumerate(defauts):
+        if not ids.valid[i]:
             continue
+        code = codes[i]
+        id_ = ids.values[i]
+
+        source = f"défaut {code} #{i + 1}"
 
         # ARP
         num_text = (id_ % 1_00_00_00 + BASE_ID_FAULT_DESCRIPTION) * 100
-        lines.append(_csv_line(num_text, d.get(COL_DEFAUT_RESOLUTION_ARP)))
+        yield BASE_ID_FAULT_DESCRIPTION, num_text, d.get(COL_DEFAUT_RESOLUTION_ARP), source
 
         # Client
         num_text = (id_ % 1_00_00_00 + BASE_ID_FAULT_DESCRIPTION) * 100 + num_lang
-        lines.append(_csv_line(num_text, d.get(COL_DEFAUT_RESOLUTION_CLIENT)))
+        yield BASE_ID_FAULT_DESCRIPTION, num_text, d.get(COL_DEFAUT_RESOLUTION_CLIENT), source
 
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
+def bypass_texts(bypass_list: List[Dict[str, Any]], num_lang: int) -> Iterator[TextEntry]:
+    nums = [b.get(COL_BYPASS_NUM) for b in bypass_list]
+    ids = coerce_column(nums, "int")
+    for _, num in ids.errors:
+        print(f"Numéro bypass invalide : {num}")
 
-def export_bypass_csv(bypass_list: List[Dict[str, Any]], num_lang: int, out_path: Path) -> None:
-    lines: List[str] = []
-
-    for b in bypass_list:
-        num = b.get(COL_BYPASS_NUM)
-        if num is None:
+    for i, b in enumerate(bypass_list):
+        if not ids.valid[i]:
             continue
+        num = nums[i]
+        id_ = ids.values[i]
 
-        try:
-            id_ = int(num)
-        except ValueError:
-            print(f"Numéro bypass invalide : {num}")
-            continue
+        source = f"bypass {num} #{i + 1}"
 
         # DESIGNATION ARP / Client
-        lines.append(_csv_line((id_ + BASE_ID_BYPASS_TEXT) * 100, b.get(COL_BYPASS_DESIGNATION_ARP)))
-        lines.append(_csv_line((id_ + BASE_ID_BYPASS_TEXT) * 100 + num_lang, b.get(COL_BYPASS_DESIGNATION_CLIENT)))
+        base = BASE_ID_BYPASS_TEXT
+        yield base, (id_ + base) * 100, b.get(COL_BYPASS_DESIGNATION_ARP), source
+        yield base, (id_ + base) * 100 + num_lang, b.get(COL_BYPASS_DESIGNATION_CLIENT), source
 
         # DESCRIPTION ARP / Client
-        lines.append(_csv_line((id_ + BASE_ID_BYPASS_DESCRIPTION) * 100, b.get(COL_BYPASS_DESCRIPTION_ARP)))
-        lines.append(
-            _csv_line((id_ + BASE_ID_BYPASS_DESCRIPTION) * 100 + num_lang, b.get(COL_BYPASS_DESCRIPTION_CLIENT))
-        )
+        base = BASE_ID_BYPASS_DESCRIPTION
+        yield base, (id_ + base) * 100, b.get(COL_BYPASS_DESCRIPTION_ARP), source
+        yield base, (id_ + base) * 100 + num_lang, b.get(COL_BYPASS_DESCRIPTION_CLIENT), source
 
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
+def button_texts(buttons: List[Dict[str, Any]], num_lang: int) -> Iterator[TextEntry]:
+    nums = [b.get(COL_BUTTON_NUM) for b in buttons]
+    ids = coerce_column(nums, "int")
+    for _, num in ids.errors:
+        print(f"Numéro bouton invalide : {num}")
 
-def export_button_csv(buttons: List[Dict[str, Any]], num_lang: int, out_path: Path) -> None:
-    lines: List[str] = []
-
-    for b in buttons:
-        num = b.get(COL_BUTTON_NUM)
-        if num is None:
+    for i, b in enumerate(buttons):
+        if not ids.valid[i]:
             continue
+        num = nums[i]
+        id_ = ids.values[i]
 
-        try:
-            id_ = int(num)
-        except ValueError:
-            print(f"Numéro bouton invalide : {num}")
-            continue
+        source = f"bouton {num} #{i + 1}"
 
         # DESIGNATION ARP / Client
-        lines.append(_csv_line((id_ + BASE_ID_BUTTON_TEXT) * 100, b.get(COL_BUTTON_DESIGNATION_ARP)))
-        lines.append(_csv_line((id_ + BASE_ID_BUTTON_TEXT) * 100 + num_lang, b.get(COL_BUTTON_DESIGNATION_CLIENT)))
+        base = BASE_ID_BUTTON_TEXT
+        yield base, (id_ + base) * 100, b.get(COL_BUTTON_DESIGNATION_ARP), source
+        yield base, (id_ + base) * 100 + num_lang, b.get(COL_BUTTON_DESIGNATION_CLIENT), source
 
         # DESCRIPTION ARP / Client
-        lines.append(_csv_line((id_ + BASE_ID_BUTTON_DESCRIPTION) * 100, b.get(COL_BUTTON_DESCRIPTION_ARP)))
-        lines.append(
-            _csv_line((id_ + BASE_ID_BUTTON_DESCRIPTION) * 100 + num_lang, b.get(COL_BUTTON_DESCRIPTION_CLIENT))
-        )
+        base = BASE_ID_BUTTON_DESCRIPTION
+        yield base, (id_ + base) * 100, b.get(COL_BUTTON_DESCRIPTION_ARP), source
+        yield base, (id_ + base) * 100 + num_lang, b.get(COL_BUTTON_DESCRIPTION_CLIENT), source
+
+
+def text_entries(data: Dict[str, Any], num_lang: int) -> Dict[str, Iterator[TextEntry]]:
+    """Nom du CSV -> textes (générateurs), avant sélection par le registre (voir accepted_texts)."""
+    return {
+        "defaut.csv": defaut_texts(data["defauts"], num_lang),
+        "bypass.csv": bypass_texts(data["bypass"], num_lang),
+        "button.csv": button_texts(data["buttons"], num_lang),
+    }
+
+
+def accepted_texts(
+    data: Dict[str, Any], num_lang: int, registry: Optional[TextIdRegistry] = None
+) -> Dict[str, List[TextEntry]]:
+    """Nom du CSV -> textes retenus.
+
+    Tous les IDs sont déclarés au registre dans un ordre fixe (fichier, puis ligne) avant de choisir
+    les lignes retenues : le résultat ne dépend pas de l'ordre d'exécution des étapes.
+    """
+    texts = {name: list(entries) for name, entries in text_entries(data, num_lang).items()}
+    if registry is None:
+        return texts
+
+    for entries in texts.values():
+        for base, num_text, _, source in entries:
+            registry.add(num_text, base, source)
+    return {name: [e for e in entries if registry.keep(e[1], e[3])] for name, entries in texts.items()}
+
+
+def defaut_lines(defauts: List[Dict[str, Any]], num_lang: int) -> Iterator[str]:
+    """Lignes du CSV des textes défauts (générateur)."""
+    return csv_lines(defaut_texts(defauts, num_lang))
+
+
+def bypass_lines(bypass_list: List[Dict[str, Any]], num_lang: int) -> Iterator[str]:
+    """Lignes du CSV des textes bypass (générateur)."""
+    return csv_lines(bypass_texts(bypass_list, num_lang))
+
 
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+def button_lines(buttons: List[Dict[str, Any]], num_lang: int) -> Iterator[str]:
+    """Lignes du CSV des textes boutons (générateur)."""
+    return csv_lines(button_texts(buttons, num_lang))
+
+
+def export_defauts_csv(defauts: List[Dict[str, Any]], num_lang: int, out_path: Path) -> bool:
+    return write_lines(out_path, defaut_lines(defauts, num_lang))
+
+
+def export_bypass_csv(bypass_list: List[Dict[str, Any]], num_lang: int, out_path: Path) -> bool:
+    return write_lines(out_path, bypass_lines(bypass_list, num_lang))
+
+
+def export_button_csv(buttons: List[Dict[str, Any]], num_lang: int, out_path: Path) -> bool:
+    return write_lines(out_path, button_lines(buttons, num_lang))
 
 
 # ============================================================
@@ -434,16 +577,48 @@ def export_button_csv(buttons: List[Dict[str, Any]], num_lang: int, out_path: Pa
 # ============================================================
 
 
-def ensure_module_cfg(modules_cfg: Dict[str, Dict[str, Any]], module: str) -> Dict[str, Any]:
-    """Si le module n'est pas dans modules_cfg, demande à l'utilisateur et l'ajoute."""
+def ask_module_cfg(module: str) -> Dict[str, Any]:
+    num_machine = ask_input_int(f"Quel est le numéro de machine pour le module {module} : ")
+    num_module = ask_input_int(f"Quel est le numéro de module à utiliser pour le module {module} : ")
+    return {"num_machine": num_machine, "num_module": num_module}
+
+
+def ensure_module_cfg(
+    modules_cfg: Dict[str, Dict[str, Any]],
+    module: str,
+    resolve_module: Callable[[str], Dict[str, Any]] = ask_module_cfg,
+) -> Dict[str, Any]:
+    """Si le module n'est pas dans modules_cfg, le résout (par défaut : demande à l'utilisateur) et l'ajoute."""
     if module not in modules_cfg:
-        num_machine = ask_input_int(f"Quel est le numéro de machine pour le module {module} : ")
-        num_module = ask_input_int(f"Quel est le numéro de module à utiliser pour le module {module} : ")
-        modules_cfg[module] = {"num_machine": num_machine, "num_module": num_module}
+        modules_cfg[module] = resolve_module(module)
     return modules_cfg[module]
 
 
-def build_buttons_bypass_json(data: Dict[str, Any], num_com: int) -> Dict[str, Any]:
+def used_modules(data: Dict[str, Any]) -> List[Any]:
+    """Modules des bypass/boutons retenus par build_buttons_bypass_json, dans son ordre de parcours."""
+    modules: Dict[Any, None] = {}
+    for rows, col_num, col_module, is_ok in (
+        (data["bypass"], COL_BYPASS_NUM, COL_BYPASS_NUM_MODULE, check_bypass_is_ok),
+        (data["buttons"], COL_BUTTON_NUM, COL_BUTTON_NUM_MODULE, check_button_is_ok),
+    ):
+        for row in rows:
+            module = row.get(col_module)
+            if row.get(col_num) is None or module is None or not is_ok(row):
+                continue
+            modules[module] = None
+    return list(modules)
+
+
+def ask_missing_modules_cfg(data: Dict[str, Any]) -> None:
+    """Pose en amont les questions que build_buttons_bypass_json poserait (même ordre), pour pouvoir
+    ensuite construire les JSON sans interaction."""
+    for module in used_modules(data):
+        ensure_module_cfg(data["modules_cfg"], module)
+
+
+def build_buttons_bypass_json(
+    data: Dict[str, Any], num_com: int, resolve_module: Callable[[str], Dict[str, Any]] = ask_module_cfg
+) -> Dict[str, Any]:
     modules_cfg = data["modules_cfg"]
 
     json_bypasses = []
@@ -457,7 +632,7 @@ def build_buttons_bypass_json(data: Dict[str, Any], num_com: int) -> Dict[str, A
             print(f"Le bypass n°{bypass[COL_BYPASS_NUM]} est marqué comme non valide => ignoré.")
             continue
 
-        cfg = ensure_module_cfg(modules_cfg, module)
+        cfg = ensure_module_cfg(modules_cfg, module, resolve_module)
         json_bypasses.append(
             {
                 JSON_BYPASS_NUM: bypass[COL_BYPASS_NUM],
@@ -478,7 +653,7 @@ def build_buttons_bypass_json(data: Dict[str, Any], num_com: int) -> Dict[str, A
             print(f"Le bouton n°{button[COL_BUTTON_NUM]} est marqué comme non valide => ignoré.")
             continue
 
-        cfg = ensure_module_cfg(modules_cfg, module)
+        cfg = ensure_module_cfg(modules_cfg, module, resolve_module)
         json_buttons.append(
             {
                 JSON_BUTTON_NUM: button[COL_BUTTON_NUM],
@@ -553,17 +728,24 @@ def capitalize(str):
     return str[:1].upper() + str[1:]
 
 
-def build_machines(modules_cfg: Dict[str, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
-    """Regroupe les modules par machine et demande le nom machine une fois."""
+def build_machines(
+    modules_cfg: Dict[str, Dict[str, Any]], machine_names: Optional[Dict[int, Tuple[str, str]]] = None
+) -> Dict[int, Dict[str, Any]]:
+    """Regroupe les modules par machine et demande le nom machine une fois (sauf si fourni dans machine_names)."""
     machines: Dict[int, Dict[str, Any]] = {}
 
     for module, cfg in modules_cfg.items():
         num_machine = cfg["num_machine"]
         if num_machine not in machines:
+            if machine_names and num_machine in machine_names:
+                name_1, name_2 = machine_names[num_machine]
+            else:
+                name_1 = ask_input_str(f"Nom de la machine n°{num_machine} (langue 1) : ")
+                name_2 = ask_input_str(f"Nom de la machine n°{num_machine} (langue 2) : ")
             machines[num_machine] = {
                 "num": num_machine,
-                "name_1": capitalize(ask_input_str(f"Nom de la machine n°{num_machine} (langue 1) : ")),
-                "name_2": capitalize(ask_input_str(f"Nom de la machine n°{num_machine} (langue 2) : ")),
+                "name_1": capitalize(name_1),
+                "name_2": capitalize(name_2),
                 "name_3": "",
                 "ems": [],
             }
@@ -584,11 +766,25 @@ def build_machines(modules_cfg: Dict[str, Dict[str, Any]]) -> Dict[int, Dict[str
     return machines
 
 
-def add_recipes_to_machines(machines: Dict[int, Dict[str, Any]], lang: str) -> None:
-    """Pour chaque machine, propose d'ajouter les recipes depuis une DB SQLite."""
-    num_lang_bdd = TRANSLATE["bdd"][lang]
+def machine_nums(modules_cfg: Dict[str, Dict[str, Any]]) -> List[int]:
+    """Numéros de machine dans l'ordre où build_machines les crée."""
+    return list(dict.fromkeys(cfg["num_machine"] for cfg in modules_cfg.values()))
+
+
+def ask_machine_names(modules_cfg: Dict[str, Dict[str, Any]]) -> Dict[int, Tuple[str, str]]:
+    names: Dict[int, Tuple[str, str]] = {}
+    for num_machine in machine_nums(modules_cfg):
+        names[num_machine] = (
+            ask_input_str(f"Nom de la machine n°{num_machine} (langue 1) : "),
+            ask_input_str(f"Nom de la machine n°{num_machine} (langue 2) : "),
+        )
+    return names
+
 
-    for num_machine, machine in machines.items():
+def ask_recipes_dbs(num_machines: Iterable[int]) -> Dict[int, Path]:
+    """Pour chaque machine, demande si les recipes doivent être ajoutées et le chemin de la DB SQLite."""
+    db_paths: Dict[int, Path] = {}
+    for num_machine in num_machines:
         if not ask_yes_or_no(
             f"Machine {num_machine} - Voulez-vous ajouter les noms des formats ? "
             f"(demandera l'accès à la base de données des recettes)"
@@ -599,20 +795,33 @@ def add_recipes_to_machines(machines: Dict[int, Dict[str, Any]], lang: str) -> N
         if not db_path:
             continue
 
-        rows = fetch_recipes(db_path)
-        machine["recipes"] = build_recipes(rows, num_lang_bdd)
+        db_paths[num_machine] = db_path
+    return db_paths
+
+
+def load_recipes(db_paths: Dict[int, Path], num_lang_bdd: int) -> Dict[int, List[Dict[str, Any]]]:
+    return {num: build_recipes(fetch_recipes(db_path), num_lang_bdd) for num, db_path in db_paths.items()}
+
+
+def add_recipes_to_machines(
+    machines: Dict[int, Dict[str, Any]], lang: str, recipes_dbs: Optional[Dict[int, Path]] = None
+) -> None:
+    """Ajoute les recipes depuis une DB SQLite par machine (demandées à l'utilisateur si recipes_dbs n'est pas fourni)."""
+    if recipes_dbs is None:
+        recipes_dbs = ask_recipes_dbs(machines)
+    recipes = load_recipes(recipes_dbs, TRANSLATE["bdd"][lang])
+    for num_machine, machine_recipes in recipes.items():
+        machines[num_machine]["recipes"] = machine_recipes
 
 
 def add_states_to_machines(machines: Dict[int, Dict[str, Any]], states: List[Dict[str, Any]]) -> None:
     """Ajoute les states à la machine correspondante selon le nom de la machine dans l'Excel."""
-    for state in states:
+    machine_nums_col = coerce_rows(states, {COL_STATE_MACHINE: "int"}, default=-1, required=True)[COL_STATE_MACHINE]
+    for i, value in machine_nums_col.errors:
+        print(f"State '{states[i].get(COL_STATE_NAME_FR, '')}' : numéro de machine invalide : {value}")
 
-        try:
-            state_machine_num = int(state.get(COL_STATE_MACHINE, -1))
-        except (TypeError, ValueError):
-            print(
-                f"State '{state.get(COL_STATE_NAME_FR, '')}' : numéro de machine invalide : {state.get(COL_STATE_MACHINE)}"
-            )
+    for state, state_machine_num, valid in zip(states, machine_nums_col.values, machine_nums_col.valid):
+        if not valid:
             continue
 
         for num_machine, machine in machines.items():
@@ -636,13 +845,14 @@ def add_states_to_machines(machines: Dict[int, Dict[str, Any]], states: List[Dic
 
 def add_counters_to_machines(machines: Dict[int, Dict[str, Any]], counters: List[Dict[str, Any]]) -> None:
     """Ajoute les counters à la machine correspondante selon le nom de la machine dans l'Excel."""
-    for counter in counters:
-        try:
-            counter_machine_num = int(counter.get(COL_COUNTER_MACHINE, -1))  # type: ignore
-        except (TypeError, ValueError):
-            print(
-                f"Counter '{counter.get(COL_COUNTER_NAME_FR, '')}' : numéro de machine invalide : {counter.get(COL_COUNTER_MACHINE)}"
-            )
+    machine_nums_col = coerce_rows(counters, {COL_COUNTER_MACHINE: "int"}, default=-1, required=True)[
+        COL_COUNTER_MACHINE
+    ]
+    for i, value in machine_nums_col.errors:
+        print(f"Counter '{counters[i].get(COL_COUNTER_NAME_FR, '')}' : numéro de machine invalide : {value}")
+
+    for counter, counter_machine_num, valid in zip(counters, machine_nums_col.values, machine_nums_col.valid):
+        if not valid:
             continue
         for num_machine, machine in machines.items():
             if num_machine == counter_machine_num:
@@ -671,13 +881,12 @@ def add_counters_to_machines(machines: Dict[int, Dict[str, Any]], counters: List
 
 def add_charts_to_machines(machines: Dict[int, Dict[str, Any]], charts: List[Dict[str, Any]]) -> None:
     """Ajoute les charts à la machine correspondante selon le nom de la machine dans l'Excel."""
-    for chart in charts:
-        try:
-            chart_machine_num = int(chart.get(COL_CHART_MACHINE, -1))  # type: ignore
-        except (TypeError, ValueError):
-            print(
-                f"Chart '{chart.get(COL_CHART_NUM, '')}' : numéro de machine invalide : {chart.get(COL_CHART_MACHINE)}"
-            )
+    machine_nums_col = coerce_rows(charts, {COL_CHART_MACHINE: "int"}, default=-1, required=True)[COL_CHART_MACHINE]
+    for i, value in machine_nums_col.errors:
+        print(f"Chart '{charts[i].get(COL_CHART_NUM, '')}' : numéro de machine invalide : {value}")
+
+    for chart, chart_machine_num, valid in zip(charts, machine_nums_col.values, machine_nums_col.valid):
+        if not valid:
             continue
         for num_machine, machine in machines.items():
             if num_machine == chart_machine_num:
@@ -703,39 +912,113 @@ def add_charts_to_machines(machines: Dict[int, Dict[str, Any]], charts: List[Dic
 # ============================================================
 
 
+def build_machines_json(
+    machines: Dict[int, Dict[str, Any]], recipes: Dict[int, List[Dict[str, Any]]], data: Dict[str, Any], num_com: int
+) -> Dict[str, Any]:
+    for num_machine, machine_recipes in recipes.items():
+        machines[num_machine]["recipes"] = machine_recipes
+    add_states_to_machines(machines, data["states"])
+    add_counters_to_machines(machines, data["counters"])
+    add_charts_to_machines(machines, data["charts"])
+    return {"coms": [{"num": num_com, "machines": list(machines.values())}]}
+
+
+def build_stages(out_dir: Path, bundle_path: Optional[Path] = None) -> List[Stage]:
+    """Étapes non interactives du pipeline. Entrées initiales : data, num_lang_defaut, num_lang_bdd,
+    num_com, machine_names, recipes_dbs, text_ids (registre des IDs de textes).
+    Seule l'étape texts (séquentielle) utilise le registre ; les exports CSV écrivent ses textes retenus.
+    Chaque fichier généré est la sortie (changé ou non) de son étape. Avec bundle_path, toutes les
+    données générées (mêmes textes retenus que les CSV) sont aussi écrites dans un bundle SQLite,
+    étape nommée bundle_path.name, sans output_path : il est réécrit à chaque exécution."""
+
+    def csv_stage(name: str) -> Stage:
+        return Stage(
+            name,
+            lambda texts: write_lines(out_dir / name, csv_lines(texts[name])),
+            ("texts",),
+            output_path=out_dir / name,
+        )
+
+    def write_button_bypass(button_bypass_cfg):
+        return write_json(out_dir / "config_button_bypass.json", button_bypass_cfg)
+
+    def write_machines(machines_cfg):
+        return write_json(out_dir / "config_machines.json", machines_cfg)
+
+    def write_bundle(texts, button_bypass_cfg, machines_cfg):
+        write_prod_bundle(bundle_path, texts, button_bypass_cfg, machines_cfg)
+        return bundle_path
+
+    stages = [
+        Stage("texts", lambda data, num_lang_defaut, text_ids: accepted_texts(data, num_lang_defaut, text_ids),
+              ("data", "num_lang_defaut", "text_ids")),
+        csv_stage("defaut.csv"),
+        csv_stage("bypass.csv"),
+        csv_stage("button.csv"),
+        Stage("button_bypass_cfg", build_buttons_bypass_json, ("data", "num_com")),
+        Stage("config_button_bypass.json", write_button_bypass, ("button_bypass_cfg",),
+              output_path=out_dir / "config_button_bypass.json"),
+        Stage("machines", lambda data, machine_names: build_machines(data["modules_cfg"], machine_names),
+              ("data", "machine_names")),
+        Stage("recipes", lambda recipes_dbs, num_lang_bdd: load_recipes(recipes_dbs, num_lang_bdd),
+              ("recipes_dbs", "num_lang_bdd")),
+        Stage("machines_cfg", build_machines_json, ("machines", "recipes", "data", "num_com")),
+        Stage("config_machines.json", write_machines, ("machines_cfg",), output_path=out_dir / "config_machines.json"),
+    ]
+    if bundle_path is not None:
+        stages.append(
+            Stage(bundle_path.name, write_bundle, ("texts", "button_bypass_cfg", "machines_cfg"))
+        )
+    return stages
+
+
 def main() -> None:
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
     excel_path = ask_excel_file()
     if not excel_path:
         return
 
+    problems = preflight(excel_path, PREFLIGHT_RULES)
+    if problems:
+        print_problems(problems)
+        if not ask_yes_or_no("Continuer malgré tout ?"):
+            return
+
     print("Lecture du fichier Excel...")
     data = read_excel(excel_path)
 
     # Langue client + mapping
     lang = ask_language()
-    num_lang_defaut = TRANSLATE["defaut"][lang]
-
-    # Exports CSV
-    print("Export des CSV...")
-    export_defauts_csv(data["defauts"], num_lang_defaut, OUT_DIR / "defaut.csv")
-    export_bypass_csv(data["bypass"], num_lang_defaut, OUT_DIR / "bypass.csv")
-    export_button_csv(data["buttons"], num_lang_defaut, OUT_DIR / "button.csv")
 
-    # JSON button/bypass
-    print("Construction du JSON machines + buttons/bypass...")
+    # Toutes les questions sont posées avant de lancer les étapes (exécutées en parallèle)
     num_com = ask_input_int("Numéro de COM : ")
-    j = build_buttons_bypass_json(data, num_com)
-    (OUT_DIR / "config_button_bypass.json").write_text(json.dumps(j, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    # JSON machines + recipes
-    print("Construction du JSON machines + recipes...")
-    machines = build_machines(data["modules_cfg"])
-    add_recipes_to_machines(machines, lang)
-    add_states_to_machines(machines, data["states"])
-    add_counters_to_machines(machines, data["counters"])
-    add_charts_to_machines(machines, data["charts"])
-    out = {"coms": [{"num": num_com, "machines": list(machines.values())}]}
-    (OUT_DIR / "config_machines.json").write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    ask_missing_modules_cfg(data)
+    machine_names = ask_machine_names(data["modules_cfg"])
+    recipes_dbs = ask_recipes_dbs(machine_nums(data["modules_cfg"]))
+
+    print("Export des CSV + construction des JSON machines, buttons/bypass, recipes...")
+    values: Dict[str, Any] = {
+        "data": data,
+        "num_lang_defaut": TRANSLATE["defaut"][lang],
+        "num_lang_bdd": TRANSLATE["bdd"][lang],
+        "num_com": num_com,
+        "machine_names": machine_names,
+        "recipes_dbs": recipes_dbs,
+        "text_ids": TextIdRegistry(TEXT_ID_RANGES, dedupe=DEDUPE_TEXT_IDS),
+    }
+    bundle_path = OUT_DIR / BUNDLE_NAME if EXPORT_SQLITE_BUNDLE else None
+    stages = build_stages(OUT_DIR, bundle_path)
+    errors = run_stages(stages, values)
+    values["text_ids"].print_report()
+
+    for name, e in errors.items():
+        print(f"Étape '{name}' en échec : {e}")
+
+    outputs = {s.output_path: values[s.name] for s in stages if s.output_path is not None and s.name in values}
+    print_output_report(outputs)
+    if bundle_path is not None and bundle_path.name in values:
+        print("Bundle SQLite écrit :", bundle_path.name)
 
 
 if __name__ == "__main__":
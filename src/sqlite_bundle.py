@@ -0,0 +1,143 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+BUNDLE_NAME = "awm_bundle.sqlite3"
+
+# table -> (colonnes, index)
+SCHEMA: Dict[str, Tuple[Sequence[str], Sequence[Sequence[str]]]] = {
+    "texts": (
+        ("num_text INTEGER", "id INTEGER", "lang INTEGER", "base INTEGER", "file TEXT", "text TEXT", "source TEXT"),
+        (("num_text",), ("file", "id")),
+    ),
+    "bypasses": (("num INTEGER", "num_machine INTEGER", "num_em INTEGER", "alias TEXT", "com INTEGER"), (("num",),)),
+    "buttons": (("num INTEGER", "num_machine INTEGER", "num_em INTEGER", "alias TEXT", "com INTEGER"), (("num",),)),
+    "machines": (("num INTEGER", "name_1 TEXT", "name_2 TEXT", "name_3 TEXT", "com INTEGER"), (("num",),)),
+    "ems": (
+        ("num_machine INTEGER", "num INTEGER", "name_1 TEXT", "name_2 TEXT", "name_3 TEXT",
+         "nb_in_machine INTEGER", "utility INTEGER", "checked INTEGER"),
+        (("num_machine", "num"),),
+    ),
+    "recipes": (
+        ("num_machine INTEGER", "num INTEGER", "name_1 TEXT", "name_2 TEXT", "name_3 TEXT",
+         "used INTEGER", "checked INTEGER"),
+        (("num_machine", "num"),),
+    ),
+    "states": (
+        ("num_machine INTEGER", "bit INTEGER", "type TEXT", "color TEXT", "name_fr TEXT", "name_en TEXT"),
+        (("num_machine", "bit"),),
+    ),
+    "counters": (
+        ("num_machine INTEGER", "num INTEGER", "name_fr TEXT", "unit_fr TEXT", "name_en TEXT", "unit_en TEXT"),
+        (("num_machine", "num"),),
+    ),
+    "charts": (("num_machine INTEGER", "chart TEXT", "counter INTEGER", "color TEXT"), (("num_machine", "chart"),)),
+    "motors": (("axname TEXT", "ref_gearbox TEXT", "feed_constant REAL"), (("axname",),)),
+}
+
+
+# ============================================================
+# Écriture
+# ============================================================
+
+
+def _value(v: Any) -> Any:
+    """Valeur stockable par sqlite3 (les dates/objets Excel sont convertis en texte)."""
+    if v is None or isinstance(v, (int, float, str, bytes)):
+        return v
+    return str(v)
+
+
+def _locale(entry: Dict[str, Any], lang: str, key: str = "name") -> Any:
+    for loc in entry.get("locale", []):
+        if loc.get("language_code") == lang:
+            return loc.get(key)
+    return None
+
+
+def write_tables(db_path: Path, rows_by_table: Dict[str, Iterable[Sequence[Any]]]) -> None:
+    """Remplace les tables données (les autres sont conservées) en une seule transaction."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        for table, rows in rows_by_table.items():
+            columns, indexes = SCHEMA[table]
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+            placeholders = ", ".join("?" * len(columns))
+            conn.executemany(
+                f"INSERT INTO {table} VALUES ({placeholders})", (tuple(_value(v) for v in row) for row in rows)
+            )
+            for cols in indexes:
+                conn.execute(f"CREATE INDEX idx_{table}_{'_'.join(cols)} ON {table} ({', '.join(cols)})")
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def text_rows(texts_by_file: Dict[str, Iterable[Tuple[int, int, Optional[str], str]]]) -> Iterable[Tuple]:
+    for file, texts in texts_by_file.items():
+        for base, num_text, text, source in texts:
+            yield num_text, num_text // 100, num_text % 100, base, file, text, source
+
+
+def _button_bypass_rows(cfg: Dict[str, Any], key: str) -> List[Tuple]:
+    return [
+        (b["num"], b["num_machine"], b["num_em"], b["alias"], com["num"]) for com in cfg["coms"] for b in com[key]
+    ]
+
+
+def machines_rows(cfg: Dict[str, Any]) -> Dict[str, List[Tuple]]:
+    """Lignes des tables machines/ems/recipes/states/counters/charts à partir de config_machines.json."""
+    rows: Dict[str, List[Tuple]] = {t: [] for t in ("machines", "ems", "recipes", "states", "counters", "charts")}
+    for com in cfg["coms"]:
+        for m in com["machines"]:
+            num = m["num"]
+            rows["machines"].append((num, m["name_1"], m["name_2"], m["name_3"], com["num"]))
+            for em in m["ems"]:
+                rows["ems"].append(
+                    (num, em["num"], em["name_1"], em["name_2"], em["name_3"], em["nb_in_machine"], em["utility"],
+                     em["checked"])
+                )
+            for r in m.get("recipes", []):
+                rows["recipes"].append((num, r["num"], r["name_1"], r["name_2"], r["name_3"], r["used"], r["checked"]))
+            for s in m.get("states", []):
+                rows["states"].append((num, s["bit"], s["type"], s["color"], _locale(s, "fr"), _locale(s, "en")))
+            for c in m.get("counters", []):
+                rows["counters"].append(
+                    (num, c["num"], _locale(c, "fr"), _locale(c, "fr", "unit"), _locale(c, "en"),
+                     _locale(c, "en", "unit"))
+                )
+            for chart, entries in m.get("charts", {}).items():
+                for e in entries:
+                    rows["charts"].append((num, chart, e["counter"], e["color"]))
+    return rows
+
+
+def write_prod_bundle(
+    db_path: Path,
+    texts_by_file: Dict[str, Iterable[Tuple[int, int, Optional[str], str]]],
+    button_bypass_cfg: Dict[str, Any],
+    machines_cfg: Dict[str, Any],
+) -> None:
+    """Textes, buttons/bypasses et machines (avec EMs, recipes, states, counters, charts) de set_prod_app."""
+    tables: Dict[str, Iterable[Sequence[Any]]] = {
+        "texts": text_rows(texts_by_file),
+        "bypasses": _button_bypass_rows(button_bypass_cfg, "bypasses"),
+        "buttons": _button_bypass_rows(button_bypass_cfg, "buttons"),
+    }
+    tables.update(machines_rows(machines_cfg))
+    write_tables(db_path, tables)
+
+
+def write_motors_bundle(db_path: Path, motors: Iterable[Tuple[str, Any, float]]) -> None:
+    """Moteurs de set_diag_app (même fichier que le bundle production, seule la table motors est remplacée)."""
+    write_tables(db_path, {"motors": motors})
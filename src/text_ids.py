@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Tuple
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+LANG_SLOTS = 100  # num_text = id * 100 + langue
+MAX_REPORTED = 20
+
+
+# ============================================================
+# Registre des IDs de textes (doublons / plages)
+# ============================================================
+
+
+class TextIdRegistry:
+    """Registre de tous les IDs de textes générés, alimenté avant l'écriture des exports CSV.
+
+    ranges : {base: fin} ; un ID de base b doit vérifier base <= b < fin (plages BASE_ID_*).
+    Un même ID produit deux fois par la même ligne source (ARP et client quand la langue client
+    vaut 0) n'est pas un conflit. Pour chaque ID, l'occurrence retenue est la première dans sa plage
+    (dans l'ordre de déclaration : fichier, puis ligne), sinon la première tout court ; avec dedupe=True,
+    les autres occurrences sont retirées des exports. Tous les IDs doivent être déclarés (add) avant
+    d'interroger keep, ce qui rend le résultat indépendant de l'ordre d'exécution des étapes.
+    """
+
+    def __init__(self, ranges: Dict[int, int], dedupe: bool = False):
+        self.ranges = ranges
+        self.dedupe = dedupe
+        self._sources: Dict[int, Dict[Any, None]] = {}  # num_text -> sources distinctes, dans l'ordre
+        self._winners: Dict[int, Tuple[Any, bool]] = {}  # num_text -> (source retenue, dans la plage)
+        self._out_of_range: Dict[Tuple[int, Any], int] = {}  # (num_text, source) -> base
+
+    def add(self, num_text: int, base: int, source: Any) -> None:
+        """Déclare num_text (généré à partir de la base base) pour la ligne source. Temps constant."""
+        in_range = base <= num_text // LANG_SLOTS < self.ranges[base]
+        if not in_range:
+            self._out_of_range.setdefault((num_text, source), base)
+
+        self._sources.setdefault(num_text, {})[source] = None
+        winner = self._winners.get(num_text)
+        if winner is None or (in_range and not winner[1]):
+            self._winners[num_text] = (source, in_range)
+
+    def keep(self, num_text: int, source: Any) -> bool:
+        """False si la ligne de num_text issue de source doit être omise (doublon non retenu, dedupe=True)."""
+        return not self.dedupe or self._winners[num_text][0] == source
+
+    def _duplicates(self) -> List[Tuple[int, Any, Any]]:
+        """[(num_text, source retenue, autre source)] dans l'ordre de déclaration."""
+        out = []
+        for num_text, sources in self._sources.items():
+            if len(sources) > 1:
+                winner = self._winners[num_text][0]
+                out.extend((num_text, winner, s) for s in sources if s != winner)
+        return out
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def problems(self) -> List[str]:
+        out = [
+            f"ID {num_text} hors plage [{base * LANG_SLOTS}; {self.ranges[base] * LANG_SLOTS}[ ({source})"
+            for (num_text, source), base in self._out_of_range.items()
+        ]
+        action = "omis" if self.dedupe else "conservé"
+        out.extend(
+            f"ID {num_text} en double : {first} / {source} ({action})" for num_text, first, source in self._duplicates()
+        )
+        return out
+
+    def print_report(self) -> None:
+        problems = self.problems()
+        if not problems:
+            return
+        print(
+            f"IDs de textes : {len(self._duplicates())} doublon(s), {len(self._out_of_range)} hors plage "
+            f"sur {len(self)} IDs"
+        )
+        for p in problems[:MAX_REPORTED]:
+            print(" -", p)
+        if len(problems) > MAX_REPORTED:
+            print(f" - ... ({len(problems) - MAX_REPORTED} autres)")
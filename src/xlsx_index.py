@@ -0,0 +1,92 @@
+import json
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from xlsx_parts import (
+    REL_TYPE_SHARED_STRINGS,
+    REL_TYPE_TABLE,
+    WORKBOOK_PART,
+    read_rels,
+    read_table_def,
+    rels_path,
+    sheet_parts,
+)
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+INDEX_SUFFIX = ".awmidx.json"
+INDEX_VERSION = 2
+
+# Valeurs de cellules conservées telles quelles par json
+JSON_TYPES = (str, int, float, bool, type(None))
+
+# {"title", "part", "tables": [{"name", "ref", "headers", "part"}], "cells" (feuilles sans table) : {coord: valeur}}
+SheetLayout = Dict[str, Any]
+
+
+# ============================================================
+# Emplacement des tables (sans lire les feuilles)
+# ============================================================
+
+
+def index_path_for(excel_path: Path) -> Path:
+    return excel_path.with_name(excel_path.name + INDEX_SUFFIX)
+
+
+def scan_layout(zf: zipfile.ZipFile) -> List[SheetLayout]:
+    """Feuilles et tables du classeur, lues dans workbook.xml, les rels des feuilles et les parties des tables."""
+    layout = []
+    for title, part in sheet_parts(zf):
+        tables = []
+        for _, table_part in read_rels(zf, part, REL_TYPE_TABLE):
+            name, ref, headers = read_table_def(zf, table_part)
+            tables.append({"name": name, "ref": ref, "headers": headers, "part": table_part})
+        layout.append({"title": title, "part": part, "tables": tables})
+    return layout
+
+
+def _members(zf: zipfile.ZipFile, layout: List[SheetLayout]) -> Dict[str, Optional[int]]:
+    """CRC (répertoire central du zip, sans décompression) des parties dont dépend l'index ; None si absente.
+
+    Les feuilles qui ont des tables sont relues à chaque fois : seules celles dont les cellules sont
+    en cache (et alors sharedStrings.xml) en font partie.
+    """
+    parts = [WORKBOOK_PART, rels_path(WORKBOOK_PART)]
+    for sheet in layout:
+        parts.append(rels_path(sheet["part"]))
+        parts.extend(t["part"] for t in sheet["tables"])
+        if "cells" in sheet:
+            parts.append(sheet["part"])
+    if any("cells" in sheet for sheet in layout):
+        parts.extend(p for _, p in read_rels(zf, WORKBOOK_PART, REL_TYPE_SHARED_STRINGS))
+
+    infos = zf.NameToInfo
+    return {p: infos[p].CRC if p in infos else None for p in parts}
+
+
+def load_index(zf: zipfile.ZipFile, index_path: Path) -> Optional[List[SheetLayout]]:
+    """Feuilles de l'index si celui-ci correspond encore au classeur (CRC des parties), None sinon."""
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    infos = zf.NameToInfo
+    for part, crc in index["members"].items():
+        if (infos[part].CRC if part in infos else None) != crc:
+            return None
+    return index["sheets"]
+
+
+def write_index(zf: zipfile.ZipFile, index_path: Path, layout: List[SheetLayout]) -> None:
+    """Écrit l'index à côté du classeur ; ignoré si le dossier n'est pas accessible en écriture."""
+    index = {"version": INDEX_VERSION, "members": _members(zf, layout), "sheets": layout}
+    try:
+        index_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        pass
@@ -0,0 +1,98 @@
+import posixpath
+import zipfile
+from typing import List, Optional, Tuple
+from xml.etree import ElementTree
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+REL_TYPE_WORKSHEET = NS_REL + "/worksheet"
+REL_TYPE_TABLE = NS_REL + "/table"
+REL_TYPE_SHARED_STRINGS = NS_REL + "/sharedStrings"
+
+WORKBOOK_PART = "xl/workbook.xml"
+
+TAG_TEXT = f"{{{NS_MAIN}}}t"
+TAG_RUN = f"{{{NS_MAIN}}}r"
+
+
+# ============================================================
+# Lecture des parties OOXML (sans openpyxl)
+# ============================================================
+
+
+def rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _resolve(source_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def read_rels(zf: zipfile.ZipFile, part: str, rel_type: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Relations d'une partie : [(Id, chemin cible dans le zip)], filtrées par type si demandé."""
+    path = rels_path(part)
+    if path not in zf.NameToInfo:
+        return []
+    rels = []
+    for rel in ElementTree.fromstring(zf.read(path)).iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        if rel_type is not None and rel.get("Type") != rel_type:
+            continue
+        rels.append((rel.get("Id"), _resolve(part, rel.get("Target", ""))))
+    return rels
+
+
+def sheet_parts(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Feuilles de calcul dans l'ordre du classeur : [(nom de la feuille, chemin de la partie XML)]."""
+    targets = dict(read_rels(zf, WORKBOOK_PART, REL_TYPE_WORKSHEET))
+    sheets = []
+    for sheet in ElementTree.fromstring(zf.read(WORKBOOK_PART)).iter(f"{{{NS_MAIN}}}sheet"):
+        part = targets.get(sheet.get(f"{{{NS_REL}}}id"))
+        if part is not None:
+            sheets.append((sheet.get("name"), part))
+    return sheets
+
+
+def element_text(node) -> str:
+    """Texte d'un élément <si>/<is> : <t> direct + runs <r><t> (le phonétique <rPh> est ignoré), comme openpyxl."""
+    plain = []
+    runs = []
+    for child in node:
+        if child.tag == TAG_TEXT:
+            plain.append(child.text or "")
+        elif child.tag == TAG_RUN:
+            runs.extend(t.text or "" for t in child if t.tag == TAG_TEXT)
+    return "".join(plain + runs)
+
+
+def read_shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    """Table des chaînes partagées (vide si le classeur n'en a pas)."""
+    parts = [part for _, part in read_rels(zf, WORKBOOK_PART, REL_TYPE_SHARED_STRINGS)]
+    if not parts or parts[0] not in zf.NameToInfo:
+        return []
+
+    strings: List[str] = []
+    with zf.open(parts[0]) as f:
+        for _, node in ElementTree.iterparse(f):
+            if node.tag == f"{{{NS_MAIN}}}si":
+                strings.append(element_text(node).replace("x005F_", ""))
+                node.clear()
+    return strings
+
+
+def read_table_def(zf: zipfile.ZipFile, part: str) -> Tuple[str, str, List[str]]:
+    """Définition d'une table : (nom, plage, noms des colonnes = ligne d'en-tête)."""
+    root = ElementTree.fromstring(zf.read(part))
+    columns = [(c.get("name") or "").strip() for c in root.iter(f"{{{NS_MAIN}}}tableColumn")]
+    return root.get("name") or root.get("displayName"), root.get("ref"), columns
+
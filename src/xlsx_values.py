@@ -0,0 +1,197 @@
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+from openpyxl.utils.cell import coordinate_to_tuple, range_boundaries
+from openpyxl.utils.datetime import from_ISO8601
+
+from xlsx_index import JSON_TYPES, load_index, scan_layout, write_index
+from xlsx_parts import NS_MAIN, element_text, read_shared_strings
+
+# ============================================================
+# Constantes / Config
+# ============================================================
+
+VALUES_ONLY_SUFFIXES = (".xlsx", ".xlsm")
+
+TAG_ROW = f"{{{NS_MAIN}}}row"
+TAG_CELL = f"{{{NS_MAIN}}}c"
+TAG_VALUE = f"{{{NS_MAIN}}}v"
+TAG_INLINE_STRING = f"{{{NS_MAIN}}}is"
+TAG_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+
+# (min_col, min_row, max_col, max_row)
+Bounds = Tuple[int, int, int, int]
+
+
+# ============================================================
+# Lecture des valeurs seules (sans styles, dessins ni VBA)
+# ============================================================
+
+
+class _ValueCell:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _ValueTable:
+    def __init__(self, ref: str):
+        self.ref = ref
+
+
+def _cast_number(value: str) -> Any:
+    """Même règle qu'openpyxl : float si le texte contient '.', 'E' ou 'e', int sinon."""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _cell_value(c, shared_strings: Sequence[str]) -> Any:
+    """Valeur mise en cache d'une cellule <c>, comme openpyxl en data_only (sans les formats de date)."""
+    data_type = c.get("t", "n")
+    if data_type == "inlineStr":
+        node = c.find(TAG_INLINE_STRING)
+        return element_text(node) if node is not None else None
+
+    value = c.findtext(TAG_VALUE) or None
+    if value is None:
+        return None
+    if data_type == "n":
+        return _cast_number(value)
+    if data_type == "s":
+        return shared_strings[int(value)]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "d":
+        return from_ISO8601(value)
+    return value  # "str" (résultat de formule), "e" (erreur)
+
+
+def read_sheet_values(
+    zf: zipfile.ZipFile, part: str, bounds: Sequence[Bounds], shared_strings: Sequence[str]
+) -> Dict[Tuple[int, int], Any]:
+    """{(ligne, colonne): valeur} des cellules non vides comprises dans bounds.
+
+    Le XML de la feuille est lu en flux et abandonné après la dernière ligne utile
+    (la mise en forme conditionnelle, les validations etc. qui suivent <sheetData> ne sont jamais lues).
+    """
+    values: Dict[Tuple[int, int], Any] = {}
+    if not bounds:
+        return values
+    last_row = max(b[3] for b in bounds)
+
+    row_num = 1
+    col_num = 0
+    active = [b for b in bounds if b[1] <= row_num <= b[3]]
+
+    with zf.open(part) as f:
+        for _, node in ElementTree.iterparse(f):
+            tag = node.tag
+            if tag == TAG_CELL:
+                coordinate = node.get("r")
+                if coordinate:
+                    row, col_num = coordinate_to_tuple(coordinate)
+                    if row != row_num:
+                        row_num = row
+                        active = [b for b in bounds if b[1] <= row_num <= b[3]]
+                else:
+                    col_num += 1
+                if active and any(b[0] <= col_num <= b[2] for b in active):
+                    value = _cell_value(node, shared_strings)
+                    if value is not None:
+                        values[(row_num, col_num)] = value
+            elif tag == TAG_ROW:
+                r = node.get("r")
+                node.clear()
+                if r:
+                    row_num = int(r)
+                if row_num >= last_row:
+                    break
+                # ligne suivante (si ses cellules n'ont pas d'attribut r)
+                row_num += 1
+                col_num = 0
+                active = [b for b in bounds if b[1] <= row_num <= b[3]]
+            elif tag == TAG_SHEET_DATA:
+                break
+
+    return values
+
+
+class ValuesSheet:
+    """Feuille réduite aux valeurs des plages de ses tables et des cellules demandées.
+
+    Même usage qu'une feuille openpyxl pour read_excel / table_to_list : title, tables[nom].ref,
+    ws["B3"].value et ws["A1:C9"] (tuple de lignes de cellules).
+    """
+
+    def __init__(self, title: str, tables: Dict[str, str], bounds: List[Bounds], values: Dict[Tuple[int, int], Any]):
+        self.title = title
+        self.tables = {name: _ValueTable(ref) for name, ref in tables.items()}
+        self._bounds = bounds
+        self._values = values
+
+    def _check_loaded(self, min_col: int, min_row: int, max_col: int, max_row: int, key: str) -> None:
+        for b in self._bounds:
+            if b[0] <= min_col and b[1] <= min_row and max_col <= b[2] and max_row <= b[3]:
+                return
+        raise KeyError(f"Plage {key} non chargée (feuille '{self.title}', lecture des valeurs seules)")
+
+    def __getitem__(self, key: str):
+        if ":" not in key:
+            row, col = coordinate_to_tuple(key)
+            self._check_loaded(col, row, col, row, key)
+            return _ValueCell(self._values.get((row, col)))
+
+        min_col, min_row, max_col, max_row = range_boundaries(key)
+        self._check_loaded(min_col, min_row, max_col, max_row, key)
+        return tuple(
+            tuple(_ValueCell(self._values.get((r, c))) for c in range(min_col, max_col + 1))
+            for r in range(min_row, max_row + 1)
+        )
+
+
+def values_worksheets(
+    excel_path: Path, cells: Iterable[str] = (), index_path: Optional[Path] = None
+) -> List[ValuesSheet]:
+    """Feuilles d'un .xlsx/.xlsm lues directement dans le zip.
+
+    Seules workbook.xml (+ rels), les feuilles, sharedStrings.xml et les parties des tables sont lues :
+    styles.xml, dessins, images et vbaProject.bin ne sont jamais ouverts. Lecture avec perte : sans styles,
+    une cellule au format date est rendue par son numéro de série (int pour une date seule, ex. 45293, float
+    avec une heure) et non par un datetime.
+    cells : cellules lues en plus des plages des tables sur chaque feuille (ex. "B3").
+    index_path : index des tables (voir xlsx_index). S'il correspond encore au classeur, les rels et les parties
+    des tables ne sont pas relues, ni les feuilles sans table (cellules en cache) ; sinon il est (ré)écrit.
+    """
+    cells = list(cells)
+    cell_bounds = [range_boundaries(f"{c}:{c}") for c in cells]
+    sheets: List[ValuesSheet] = []
+
+    with zipfile.ZipFile(excel_path) as zf:
+        layout = load_index(zf, index_path) if index_path is not None else None
+        fresh = layout is None
+        if fresh:
+            layout = scan_layout(zf)
+
+        shared_strings = read_shared_strings(zf)
+        for sheet in layout:
+            tables = {t["name"]: t["ref"] for t in sheet["tables"]}
+            bounds = [range_boundaries(ref) for ref in tables.values()] + cell_bounds
+            cached = sheet.get("cells")
+            if cached is not None and all(c in cached for c in cells):
+                values = {coordinate_to_tuple(c): cached[c] for c in cells if cached[c] is not None}
+            else:
+                values = read_sheet_values(zf, sheet["part"], bounds, shared_strings)
+                if fresh and not tables:
+                    cached = {c: values.get(coordinate_to_tuple(c)) for c in cells}
+                    if all(isinstance(v, JSON_TYPES) for v in cached.values()):
+                        sheet["cells"] = cached
+            sheets.append(ValuesSheet(sheet["title"], tables, bounds, values))
+
+        if fresh and index_path is not None:
+            write_index(zf, index_path, layout)
+
+    return sheets